@@ -0,0 +1,437 @@
+"""
+MCP 파일 시스템 서버 부하 테스트
+
+합성 디렉토리 트리를 만들고 목록/읽기/검색/통계 요청을 섞어 지정한 동시성으로
+보낸 뒤 도구별 p50/p99 지연 시간과 초당 처리량을 보고합니다.
+- inproc: 같은 프로세스에서 handle_jsonrpc_message를 직접 호출 (전송 계층 제외)
+- stdio/tcp/unix: server.py를 하위 프로세스로 띄워 실제 전송 계층으로 요청
+
+사용 예:
+    python load_test.py --transport all --concurrency 32 --requests 5000
+    python load_test.py --root ~/project --mix read=8,search=2 --json
+"""
+
+import asyncio
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+import server as mcp_server
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger("load_test")
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+# 합성 파일 내용에 쓰는 단어 (검색 요청의 패턴으로도 사용)
+WORDS = [
+    "agent", "protocol", "message", "resource", "gateway", "context", "session",
+    "registry", "handler", "stream", "budget", "latency", "cache", "index"
+]
+EXTENSIONS = [".py", ".md", ".txt", ".json", ".log"]
+
+DEFAULT_MIX = "list=3,read=5,search=1,stats=1,resources=1"
+
+def generate_tree(root: str, depth: int = 3, fanout: int = 4, files_per_dir: int = 10,
+                  file_size: int = 4096, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """root 아래에 합성 트리 생성 후 (디렉토리 목록, 파일 목록) 반환
+
+    디렉토리는 fanout^1 + ... + fanout^depth 개, 각 디렉토리에 files_per_dir개 파일이
+    생기며, 파일 내용은 WORDS와 줄 번호 표식(needle_N)으로 채워집니다.
+    """
+    rng = random.Random(seed)
+    dirs, files = [root], []
+    frontier = [root]
+    for _ in range(depth):
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                path = os.path.join(parent, f"d{i}")
+                os.makedirs(path, exist_ok=True)
+                next_frontier.append(path)
+        dirs.extend(next_frontier)
+        frontier = next_frontier
+
+    counter = itertools.count()
+    for directory in dirs:
+        for i in range(files_per_dir):
+            path = os.path.join(directory, f"f{i}{EXTENSIONS[i % len(EXTENSIONS)]}")
+            lines, size = [], 0
+            while size < file_size:
+                line = " ".join(rng.choice(WORDS) for _ in range(8)) + f" needle_{next(counter)}"
+                lines.append(line)
+                size += len(line) + 1
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines)[:file_size])
+            files.append(path)
+    return dirs, files
+
+def scan_tree(root: str, limit: int = 100000) -> Tuple[List[str], List[str]]:
+    """기존 디렉토리에서 요청 대상 (디렉토리 목록, 파일 목록) 수집"""
+    dirs, files = [], []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in (
+            ".git", "__pycache__", "node_modules", ".venv", "venv", "dist", "build")]
+        dirs.append(dirpath)
+        files.extend(
+            os.path.join(dirpath, name) for name in filenames
+            if os.path.splitext(name)[1].lower() in {".txt", ".md", ".py", ".js", ".ts", ".json",
+                                                     ".yaml", ".yml", ".log", ".csv", ".toml"}
+        )
+        if len(files) >= limit:
+            break
+    return dirs, files
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"list=3,read=5" 형식의 요청 비율"""
+    mix = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, weight = item.split("=", 1)
+            mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(WorkloadGenerator.OPERATIONS)
+    if unknown:
+        raise ValueError(f"알 수 없는 요청 종류: {', '.join(sorted(unknown))}")
+    return mix
+
+class WorkloadGenerator:
+    """요청 비율에 따라 JSON-RPC 메시지를 무작위로 생성"""
+
+    OPERATIONS = ("list", "read", "search", "stats", "resources")
+
+    def __init__(self, dirs: List[str], files: List[str], mix: Dict[str, float], seed: int = 0):
+        self.dirs = dirs
+        self.files = files
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.names]
+        self.rng = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    def next(self) -> Tuple[str, Dict[str, Any]]:
+        """(요청 종류, 메시지)"""
+        op = self.rng.choices(self.names, self.weights)[0]
+        if op == "resources":
+            return op, self._message("resources/list", {})
+        if op == "list":
+            arguments = {"path": self.rng.choice(self.dirs)}
+            tool = "list_directory"
+        elif op == "read":
+            arguments = {"path": self.rng.choice(self.files)}
+            tool = "read_file"
+        elif op == "search":
+            arguments = {"pattern": self.rng.choice(WORDS), "search_in_content": True, "max_results": 20}
+            tool = "search_files"
+        else:
+            # 통계는 루트가 아닌 하위 디렉토리 대상 (루트 전체 순회만 반복하지 않도록)
+            arguments = {"path": self.rng.choice(self.dirs[1:] or self.dirs)}
+            tool = "file_stats"
+        return op, self._message("tools/call", {"name": tool, "arguments": arguments})
+
+    def _message(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+
+def is_error(response: Optional[Dict[str, Any]]) -> bool:
+    if not response or "error" in response:
+        return True
+    result = response.get("result")
+    return isinstance(result, dict) and bool(result.get("isError"))
+
+class InProcessClient:
+    """같은 프로세스에서 handle_jsonrpc_message 직접 호출"""
+
+    def __init__(self, server: "mcp_server.FileSystemMCPServer", name: str):
+        self.server = server
+        self.session = mcp_server.ClientSession(None)
+        self.name = name
+
+    async def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        return await mcp_server.handle_jsonrpc_message(self.server, message, self.session)
+
+    async def close(self):
+        self.server.subscriptions.drop_session(self.session)
+
+class StreamClient:
+    """줄 단위 JSON-RPC 클라이언트 (응답은 id로 짝지어 순서와 무관하게 처리)"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer, name: str):
+        self.reader = reader
+        self.writer = writer
+        self.name = name
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                # 알림(청크/변경)은 무시하고 응답만 대기 중인 요청에 전달
+                future = self._pending.pop(message.get("id"), None) if "id" in message else None
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("서버 연결이 끊어졌습니다"))
+
+    async def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        # 클라이언트끼리 id가 겹치지 않도록 연결별 id로 교체
+        message = dict(message, id=next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message["id"]] = future
+        self.writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self._reader_task.cancel()
+
+class ServerProcess:
+    """server.py 하위 프로세스 (전송 방식별 실행과 연결)"""
+
+    def __init__(self, transport: str, root: str, max_concurrency: int, env: Dict[str, str]):
+        self.transport = transport
+        self.root = root
+        self.max_concurrency = max_concurrency
+        self.env = {**os.environ, **env, "PROJECT_ROOT": root}
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.port = None
+        self.socket_path = None
+
+    async def start(self):
+        args = [sys.executable, SERVER_SCRIPT, "--transport", self.transport,
+                "--max-concurrency", str(self.max_concurrency)]
+        if self.transport == "tcp":
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                self.port = probe.getsockname()[1]
+            args += ["--port", str(self.port)]
+        elif self.transport == "unix":
+            self.socket_path = os.path.join(tempfile.mkdtemp(prefix="mcp-load-"), "server.sock")
+            args += ["--socket", self.socket_path]
+
+        self.process = await asyncio.create_subprocess_exec(
+            *args, env=self.env, cwd=self.root,
+            stdin=asyncio.subprocess.PIPE if self.transport == "stdio" else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE if self.transport == "stdio" else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=mcp_server.JSONRPCConnection.MAX_MESSAGE_SIZE
+        )
+
+    async def connect(self, name: str) -> StreamClient:
+        if self.transport == "stdio":
+            # stdio는 프로세스당 연결 하나 (클라이언트들이 공유)
+            return StreamClient(self.process.stdout, self.process.stdin, name)
+
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                if self.transport == "tcp":
+                    reader, writer = await asyncio.open_connection(
+                        "127.0.0.1", self.port, limit=mcp_server.JSONRPCConnection.MAX_MESSAGE_SIZE)
+                else:
+                    reader, writer = await asyncio.open_unix_connection(
+                        self.socket_path, limit=mcp_server.JSONRPCConnection.MAX_MESSAGE_SIZE)
+                return StreamClient(reader, writer, name)
+            except OSError:
+                if time.monotonic() > deadline or self.process.returncode is not None:
+                    raise
+                await asyncio.sleep(0.05)
+
+    async def stop(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        if self.socket_path:
+            shutil.rmtree(os.path.dirname(self.socket_path), ignore_errors=True)
+
+async def drive(clients: List[Any], generator: WorkloadGenerator, requests: int,
+                concurrency: int, warmup: int = 0) -> Dict[str, Any]:
+    """concurrency개 작업자가 clients를 나눠 쓰며 requests개 요청을 보내고 결과 집계"""
+    for client in clients:
+        await client.request({"jsonrpc": "2.0", "id": 0, "method": "initialize",
+                              "params": {"clientInfo": {"name": client.name}}})
+    for _ in range(warmup):
+        await clients[0].request(generator.next()[1])
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    overall = {"histogram": mcp_server.LatencyHistogram(), "errors": 0}
+    remaining = itertools.count()
+
+    async def worker(client):
+        while next(remaining) < requests:
+            op, message = generator.next()
+            started = time.perf_counter()
+            try:
+                response = await client.request(message)
+            except Exception as e:
+                logger.warning(f"요청 실패 ({op}): {e}")
+                response = None
+            elapsed = time.perf_counter() - started
+            failed = int(is_error(response))
+            for entry in (stats.setdefault(op, {"histogram": mcp_server.LatencyHistogram(), "errors": 0}),
+                          overall):
+                entry["histogram"].record(elapsed * 1_000_000)
+                entry["errors"] += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(clients[i % len(clients)]) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    report = {"requests": requests, "concurrency": concurrency, "clients": len(clients),
+              "seconds": round(wall, 3), "ops_per_sec": round(requests / wall, 1) if wall else 0.0,
+              "operations": {}}
+    for op, entry in [*sorted(stats.items()), ("total", overall)]:
+        histogram = entry["histogram"]
+        report["operations"][op] = {
+            "count": histogram.count,
+            "errors": entry["errors"],
+            "ops_per_sec": round(histogram.count / wall, 1) if wall else 0.0,
+            "mean_ms": round(histogram.total / histogram.count / 1000, 3) if histogram.count else 0.0,
+            "p50_ms": round(histogram.percentile(50) / 1000, 3),
+            "p99_ms": round(histogram.percentile(99) / 1000, 3),
+            "max_ms": round(histogram.max / 1000, 3)
+        }
+    return report
+
+async def run_load_test(root: str, transport: str, dirs: List[str], files: List[str],
+                        mix: Dict[str, float], requests: int, concurrency: int,
+                        clients: int = 1, warmup: int = 50, seed: int = 0) -> Dict[str, Any]:
+    """한 전송 방식으로 부하 테스트 실행"""
+    per_client = max(1, math.ceil(concurrency / clients))
+    # 한 클라이언트가 동시성 전체를 쓰도록 서버의 클라이언트별 한도를 맞춤
+    env = {
+        "MCP_CLIENT_CONCURRENCY": os.environ.get("MCP_CLIENT_CONCURRENCY", str(per_client)),
+        "MCP_CLIENT_QUEUE": os.environ.get("MCP_CLIENT_QUEUE", str(max(64, per_client * 2)))
+    }
+    generator = WorkloadGenerator(dirs, files, mix, seed)
+
+    if transport == "inproc":
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        try:
+            server = mcp_server.FileSystemMCPServer(root)
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        # 메타데이터 캐시 초기 스캔이 끝난 뒤 측정
+        while server.metadata_cache is not None and not server.metadata_cache.is_ready(root):
+            await asyncio.sleep(0.05)
+        client_list = [InProcessClient(server, f"client-{i}") for i in range(clients)]
+        try:
+            report = await drive(client_list, generator, requests, concurrency, warmup)
+            report["server_stats"] = server.collect_stats()["methods"]
+        finally:
+            for client in client_list:
+                await client.close()
+            server.executor.shutdown()
+            if server.metadata_cache is not None:
+                server.metadata_cache.close()
+    else:
+        process = ServerProcess(transport, root, per_client, env)
+        await process.start()
+        try:
+            count = 1 if transport == "stdio" else clients
+            client_list = [await process.connect(f"client-{i}") for i in range(count)]
+            report = await drive(client_list, generator, requests, concurrency, warmup)
+            for client in client_list:
+                await client.close()
+        finally:
+            await process.stop()
+
+    report["transport"] = transport
+    return report
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n[{report['transport']}] 요청 {report['requests']}개, 동시성 {report['concurrency']}, "
+          f"클라이언트 {report['clients']}개: {report['seconds']}초, {report['ops_per_sec']} ops/s")
+    print(f"{'요청':<10} {'횟수':>7} {'오류':>5} {'ops/s':>9} {'mean(ms)':>9} {'p50(ms)':>9} "
+          f"{'p99(ms)':>9} {'max(ms)':>9}")
+    print("-" * 74)
+    for op, row in report["operations"].items():
+        print(f"{op:<10} {row['count']:>7} {row['errors']:>5} {row['ops_per_sec']:>9.1f} "
+              f"{row['mean_ms']:>9.2f} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP 파일 시스템 서버 부하 테스트")
+    parser.add_argument("--root", help="대상 디렉토리 (없으면 합성 트리를 임시로 생성)")
+    parser.add_argument("--depth", type=int, default=3, help="합성 트리 깊이")
+    parser.add_argument("--fanout", type=int, default=4, help="디렉토리당 하위 디렉토리 수")
+    parser.add_argument("--files-per-dir", type=int, default=10, help="디렉토리당 파일 수")
+    parser.add_argument("--file-size", type=int, default=4096, help="파일 크기 (바이트)")
+    parser.add_argument("--transport", choices=["inproc", "stdio", "tcp", "unix", "all"], default="inproc")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시에 보내는 요청 수")
+    parser.add_argument("--clients", type=int, default=1, help="클라이언트(연결) 수")
+    parser.add_argument("--requests", type=int, default=2000, help="측정할 요청 수")
+    parser.add_argument("--warmup", type=int, default=50, help="측정 전 예열 요청 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"요청 비율 (기본: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    # 측정 중 서버 로그가 결과 출력에 섞이지 않도록
+    logging.getLogger("server").setLevel(logging.WARNING)
+
+    mix = parse_mix(args.mix)
+    transports = ["inproc", "stdio", "tcp", "unix"] if args.transport == "all" else [args.transport]
+
+    temp_root = None
+    if args.root:
+        root = os.path.abspath(args.root)
+        dirs, files = scan_tree(root)
+    else:
+        temp_root = root = tempfile.mkdtemp(prefix="mcp-load-tree-")
+        dirs, files = generate_tree(root, args.depth, args.fanout, args.files_per_dir,
+                                    args.file_size, args.seed)
+    if not files:
+        parser.error("대상 디렉토리에 읽을 파일이 없습니다")
+
+    # 합성 트리의 내용 색인이 사용자 캐시 디렉토리에 쌓이지 않도록 분리
+    index_dir = None
+    if temp_root and "MCP_INDEX_DIR" not in os.environ:
+        index_dir = os.environ["MCP_INDEX_DIR"] = tempfile.mkdtemp(prefix="mcp-load-index-")
+
+    reports = []
+    try:
+        for transport in transports:
+            report = await run_load_test(
+                root, transport, dirs, files, mix, args.requests, args.concurrency,
+                args.clients, args.warmup, args.seed
+            )
+            report["tree"] = {"root": root, "directories": len(dirs), "files": len(files)}
+            reports.append(report)
+            if not args.json:
+                print_report(report)
+    finally:
+        if temp_root:
+            shutil.rmtree(temp_root, ignore_errors=True)
+        if index_dir:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    if args.json:
+        for report in reports:
+            report.pop("server_stats", None)
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
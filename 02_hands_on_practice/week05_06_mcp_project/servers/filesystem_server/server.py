@@ -8,20 +8,180 @@ MCP 파일 시스템 서버
 """
 
 import asyncio
+import argparse
+import itertools
+import functools
 import json
 import os
 import sys
 import mimetypes
-import glob
+import fnmatch
+import re
+import codecs
+import hashlib
+import sqlite3
+import threading
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import mmap
+import base64
+import contextvars
+import contextlib
+import heapq
+import bisect
+import multiprocessing
+import tempfile
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from stat import S_ISDIR
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Callable, Awaitable, Tuple
 import logging
 from datetime import datetime
 
+# 선택 의존성 (없으면 해당 응답 인코딩을 광고하지 않음)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class RootMatcher:
+    """허용 루트 경로 판정기
+
+    루트를 경로 구성요소 단위 트라이로 컴파일해 두고, 판정 시에는 경로를
+    한 번 정규화한 뒤 깊이만큼만 내려갑니다. 구성요소 단위로 비교하므로
+    루트 /root 에 대해 /rootX 는 허용되지 않습니다. 심볼릭 링크로 루트 밖을
+    가리키는 경우를 막기 위해 디렉토리별 realpath를 캐시해 함께 검사합니다.
+    """
+
+    _TERMINAL = "\0"
+
+    def __init__(self, max_cached_dirs: int = 65536):
+        self.roots: List[str] = []
+        self._lexical: Dict[str, Any] = {}
+        self._resolved: Dict[str, Any] = {}
+        self.max_cached_dirs = max_cached_dirs
+        self._real_dirs: "OrderedDict[str, str]" = OrderedDict()
+        # 캐시된 디렉토리들의 상위 경로별 개수 (무효화 대상 여부를 바로 판정)
+        self._ancestors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _parts(path: str) -> List[str]:
+        return [part for part in os.path.normcase(path).split(os.sep) if part]
+
+    @classmethod
+    def _insert(cls, trie: Dict[str, Any], path: str):
+        node = trie
+        for part in cls._parts(path):
+            node = node.setdefault(part, {})
+        node.setdefault(cls._TERMINAL, path)
+
+    @classmethod
+    def _lookup(cls, trie: Dict[str, Any], path: str) -> Optional[str]:
+        """path를 포함하는 (가장 바깥) 루트, 없으면 None"""
+        node = trie
+        if cls._TERMINAL in node:
+            return node[cls._TERMINAL]
+        for part in cls._parts(path):
+            node = node.get(part)
+            if node is None:
+                return None
+            if cls._TERMINAL in node:
+                return node[cls._TERMINAL]
+        return None
+
+    def add_root(self, root: str):
+        root = os.path.abspath(root)
+        with self._lock:
+            if root in self.roots:
+                return
+            self.roots.append(root)
+            self._insert(self._lexical, root)
+            self._insert(self._resolved, os.path.realpath(root))
+            self._real_dirs.clear()
+            self._ancestors.clear()
+
+    def invalidate(self, path: str, kind: str = None):
+        """디렉토리 변경 시 캐시된 realpath 제거 (메타데이터 캐시 리스너로도 사용)
+
+        캐시된 디렉토리 자신이나 그 상위 경로가 아니면 (대부분의 파일 이벤트)
+        바로 반환하고, 해당될 때만 하위 항목을 훑습니다.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._real_dirs and path not in self._ancestors:
+                return
+            prefix = path + os.sep
+            stale = [d for d in self._real_dirs if d == path or d.startswith(prefix)]
+            for directory in stale:
+                del self._real_dirs[directory]
+                self._track(directory, -1)
+
+    def _track(self, directory: str, delta: int):
+        """directory의 상위 경로 개수 갱신 (락 보유 상태에서 호출)"""
+        parent = os.path.dirname(directory)
+        while parent != directory:
+            count = self._ancestors.get(parent, 0) + delta
+            if count > 0:
+                self._ancestors[parent] = count
+            else:
+                self._ancestors.pop(parent, None)
+            directory, parent = parent, os.path.dirname(parent)
+
+    def _realdir(self, directory: str) -> str:
+        with self._lock:
+            real = self._real_dirs.get(directory)
+            if real is not None:
+                self._real_dirs.move_to_end(directory)
+                return real
+        real = os.path.realpath(directory)
+        with self._lock:
+            if directory not in self._real_dirs:
+                self._track(directory, 1)
+            self._real_dirs[directory] = real
+            if len(self._real_dirs) > self.max_cached_dirs:
+                evicted, _ = self._real_dirs.popitem(last=False)
+                self._track(evicted, -1)
+        return real
+
+    def match(self, path: str) -> Optional[str]:
+        """path를 포함하는 루트 (구성요소 단위 비교, 링크 해석 없음)"""
+        return self._lookup(self._lexical, os.path.abspath(path))
+
+    def allows(self, path: str, resolve_leaf: bool = False) -> bool:
+        """경로가 루트 안에 있고 실제 위치도 루트 안인지 여부
+
+        상위 디렉토리는 캐시된 realpath로 검사하고, resolve_leaf가 참이면
+        마지막 구성요소(파일 자체가 링크인 경우)까지 해석합니다.
+        """
+        abs_path = os.path.abspath(path)
+        if self._lookup(self._lexical, abs_path) is None:
+            return False
+        if resolve_leaf:
+            real = os.path.realpath(abs_path)
+        else:
+            directory, name = os.path.split(abs_path)
+            real = os.path.join(self._realdir(directory), name) if name else self._realdir(directory)
+        return self._lookup(self._resolved, real) is not None
+
 # MCP 관련 임포트 (실제 구현에서는 mcp 패키지 사용)
 class MCPServer:
     """간단한 MCP 서버 구현"""
@@ -36,23 +196,2002 @@ class MCPServer:
             "roots": {"listChanged": True}
         }
         self.roots: List[str] = []
+        self.root_matcher = RootMatcher()
+        # 루트가 추가될 때 호출할 콜백 (메타데이터 캐시 등)
+        self.root_listeners: List[Callable[[str], None]] = []
         
     def add_root(self, path: str):
         """루트 디렉토리 추가"""
         abs_path = os.path.abspath(path)
         if os.path.exists(abs_path) and os.path.isdir(abs_path):
             self.roots.append(abs_path)
+            self.root_matcher.add_root(abs_path)
             logger.info(f"루트 디렉토리 추가: {abs_path}")
+            for listener in self.root_listeners:
+                listener(abs_path)
         else:
             logger.error(f"유효하지 않은 루트 디렉토리: {abs_path}")
 
+class ContentIndex:
+    """파일 내용 트라이그램 역색인
+
+    루트별로 SQLite 파일에 (경로, mtime, 크기)와 트라이그램 포스팅을 저장합니다.
+    변경된 파일만 다시 색인하며, 검색 시에는 후보 파일 목록만 반환하므로
+    실제 일치 여부는 호출 측에서 파일을 읽어 확인해야 합니다.
+    """
+
+    def __init__(self, root: str, index_dir: str = None,
+                 max_file_size: int = 1024 * 1024, refresh_interval: float = 2.0):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.refresh_interval = refresh_interval
+        self.last_refresh = 0.0
+        self._lock = threading.RLock()
+        
+        index_dir = index_dir or os.environ.get(
+            "MCP_INDEX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "mcp-filesystem-server")
+        )
+        root_key = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+        try:
+            os.makedirs(index_dir, exist_ok=True)
+            self.db_path = os.path.join(index_dir, f"content-{root_key}.sqlite3")
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"색인 파일을 열 수 없어 메모리 색인을 사용합니다: {e}")
+            self.db_path = ":memory:"
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                indexed INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                trigram TEXT NOT NULL,
+                file_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_file ON postings(file_id);
+        """)
+        
+        # 변경 감지를 위해 (mtime, 크기)를 메모리에 유지
+        self._files: Dict[str, tuple] = {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in self.conn.execute(
+                "SELECT id, path, mtime_ns, size FROM files"
+            )
+        }
+    
+    @staticmethod
+    def trigrams(text: str) -> set:
+        """소문자 트라이그램 집합"""
+        text = text.lower()
+        return set(map("".join, zip(text, text[1:], text[2:])))
+    
+    def refresh(self, paths: Iterable[str], force: bool = False) -> int:
+        """경로 목록과 색인을 비교해 변경분만 반영 (갱신된 파일 수 반환)"""
+        with self._lock:
+            if not force and time.monotonic() - self.last_refresh < self.refresh_interval:
+                return 0
+            
+            seen = set()
+            updated = 0
+            with self.conn:
+                for path in paths:
+                    seen.add(path)
+                    if self._update(path):
+                        updated += 1
+                for path in [p for p in self._files if p not in seen]:
+                    self._delete(path)
+                    updated += 1
+            
+            self.last_refresh = time.monotonic()
+            if updated:
+                logger.info(f"내용 색인 갱신: {self.root} ({updated}개 파일)")
+            return updated
+    
+    def update_path(self, path: str) -> bool:
+        """단일 파일 색인 갱신 (삭제된 파일이면 색인에서 제거)"""
+        with self._lock, self.conn:
+            if not os.path.isfile(path):
+                return self._delete(path)
+            return self._update(path)
+    
+    def _update(self, path: str) -> bool:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return self._delete(path)
+        
+        current = self._files.get(path)
+        if current and current[1] == stat.st_mtime_ns and current[2] == stat.st_size:
+            return False
+        
+        grams = None
+        if stat.st_size <= self.max_file_size:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                    grams = self.trigrams(f.read())
+            except OSError:
+                grams = None
+        
+        indexed = int(grams is not None)
+        if current:
+            file_id = current[0]
+            self.conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+            self.conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, indexed = ? WHERE id = ?",
+                (stat.st_mtime_ns, stat.st_size, indexed, file_id)
+            )
+        else:
+            file_id = self.conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, indexed) VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, indexed)
+            ).lastrowid
+        if grams:
+            self.conn.executemany(
+                "INSERT INTO postings (trigram, file_id) VALUES (?, ?)",
+                ((gram, file_id) for gram in grams)
+            )
+        self._files[path] = (file_id, stat.st_mtime_ns, stat.st_size)
+        return True
+    
+    def _delete(self, path: str) -> bool:
+        current = self._files.pop(path, None)
+        if not current:
+            return False
+        self.conn.execute("DELETE FROM postings WHERE file_id = ?", (current[0],))
+        self.conn.execute("DELETE FROM files WHERE id = ?", (current[0],))
+        return True
+    
+    def candidates(self, pattern: str) -> List[str]:
+        """패턴을 포함할 수 있는 후보 파일 경로 (경로순)"""
+        grams = self.trigrams(pattern)
+        with self._lock:
+            if not grams:
+                # 3글자 미만 패턴은 색인으로 거를 수 없으므로 전체가 후보
+                return sorted(self._files)
+            
+            placeholders = ",".join("?" * len(grams))
+            rows = self.conn.execute(
+                f"SELECT f.path FROM postings p JOIN files f ON f.id = p.file_id "
+                f"WHERE p.trigram IN ({placeholders}) "
+                f"GROUP BY p.file_id HAVING COUNT(*) = ? "
+                f"UNION SELECT path FROM files WHERE indexed = 0 ORDER BY 1",
+                (*grams, len(grams))
+            ).fetchall()
+            return [row[0] for row in rows]
+    
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+class InotifyWatcher:
+    """inotify 기반 디렉토리 감시기 (리눅스 전용, ctypes 사용)"""
+    
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+                  IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct("iIII")
+    
+    def __init__(self, on_event: Callable[[str, str, int], None]):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify를 지원하지 않는 플랫폼입니다")
+        
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify 초기화 실패")
+        
+        self._on_event = on_event
+        self._watches: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="inotify-watcher", daemon=True)
+        self._thread.start()
+    
+    def add_watch(self, path: str) -> bool:
+        """디렉토리 감시 추가 (감시 한도 초과 등 실패 시 False)"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            return False
+        with self._lock:
+            self._watches[wd] = path
+        return True
+    
+    def _run(self):
+        while True:
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in readable:
+                break
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                
+                with self._lock:
+                    directory = self._watches.pop(wd, None) if mask & self.IN_IGNORED else self._watches.get(wd)
+                if directory is None and not mask & self.IN_Q_OVERFLOW:
+                    continue
+                try:
+                    self._on_event(directory, name, mask)
+                except Exception as e:
+                    logger.error(f"감시 이벤트 처리 오류: {e}")
+    
+    def close(self):
+        os.write(self._wake_w, b"x")
+        self._thread.join(timeout=1)
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+class MetadataCache:
+    """루트별 파일 메타데이터 캐시
+
+    루트가 추가되면 백그라운드에서 한 번 전체를 스캔하고, 이후에는 inotify
+    이벤트(사용할 수 없으면 주기적 재스캔)로 변경분만 반영합니다.
+    변경이 생기면 등록된 리스너에 (경로, 종류)를 전달합니다.
+    종류는 "created", "modified", "deleted" 중 하나입니다.
+    """
+    
+    def __init__(self, excluded_dirs: set, poll_interval: float = 2.0, use_inotify: bool = True):
+        self.excluded_dirs = excluded_dirs
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.stamps: Dict[str, tuple] = {}
+        self.children: Dict[str, List[str]] = {}  # 디렉토리 -> 정렬된 항목 이름
+        self.roots: Dict[str, str] = {}  # 루트 -> "scanning" | "inotify" | "polling"
+        self.listeners: List[Callable[[str, str], None]] = []
+        self._lock = threading.RLock()
+        self._watcher: Optional[InotifyWatcher] = None
+        self._stop = threading.Event()
+    
+    def add_root(self, root: str):
+        """루트 스캔을 시작하고 변경 감시를 등록"""
+        with self._lock:
+            if root in self.roots:
+                return
+            self.roots[root] = "scanning"
+        threading.Thread(target=self._populate, args=(root,), name="metadata-scan", daemon=True).start()
+    
+    def _populate(self, root: str):
+        started = time.monotonic()
+        watcher = self._ensure_watcher()
+        watched = self._scan(root, watch=watcher is not None)
+        
+        if watched:
+            self.roots[root] = "inotify"
+        else:
+            self.roots[root] = "polling"
+            threading.Thread(target=self._poll, args=(root,), name="metadata-poll", daemon=True).start()
+        logger.info(
+            f"메타데이터 캐시 준비: {root} ({len(self.entries)}개 항목, "
+            f"{self.roots[root]}, {time.monotonic() - started:.2f}초)"
+        )
+    
+    def _ensure_watcher(self) -> Optional[InotifyWatcher]:
+        if self._watcher is None and self.use_inotify:
+            try:
+                self._watcher = InotifyWatcher(self._on_inotify_event)
+            except (OSError, AttributeError, TypeError) as e:
+                logger.warning(f"inotify를 사용할 수 없어 폴링으로 감시합니다: {e}")
+                self.use_inotify = False
+        return self._watcher
+    
+    def _root_of(self, path: str) -> Optional[str]:
+        for root in list(self.roots):
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                return root
+        return None
+    
+    def _state(self, path: str) -> Optional[str]:
+        """경로를 포함하는 루트의 상태 (제외 디렉토리처럼 캐시에 없는 경로는 None)"""
+        path = os.path.abspath(path)
+        root = self._root_of(path)
+        return self.roots.get(root) if root is not None and path in self.entries else None
+    
+    def is_ready(self, path: str) -> bool:
+        """스캔이 끝나 캐시로 조회할 수 있는지 여부 (폴링 중이면 최대 poll_interval 늦을 수 있음)"""
+        return self._state(path) in ("inotify", "polling")
+    
+    def is_watching(self, path: str) -> bool:
+        """변경 이벤트를 즉시 받고 있는지 여부 (폴링 감시는 제외)
+
+        True이면 결과 캐시 등을 변경 이벤트만으로 무효화해도 되고, False이면
+        디렉토리 mtime 등으로 직접 유효성을 확인해야 합니다.
+        """
+        return self._state(path) == "inotify"
+    
+    # ---- 조회 ----
+    
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """캐시된 파일 정보 (없으면 None)"""
+        return self.entries.get(os.path.abspath(path))
+    
+    def list_dir(self, path: str, after: str = None, limit: int = None,
+                 skip: Iterable[str] = ()) -> Optional[List[str]]:
+        """캐시된 디렉토리 항목 이름 목록 (정렬, 캐시에 없으면 None)
+
+        after 다음 이름부터 skip에 있는 이름을 빼고 최대 limit개를 반환합니다.
+        이름은 정렬된 채로 유지되므로 O(log n + limit)입니다.
+        """
+        with self._lock:
+            names = self.children.get(os.path.abspath(path))
+            if names is None:
+                return None
+            start = bisect.bisect_right(names, after) if after is not None else 0
+            if limit is None and not skip:
+                return names[start:]
+            selected = (name for name in itertools.islice(names, start, None) if name not in skip)
+            return list(itertools.islice(selected, limit))
+    
+    def walk(self, top: str):
+        """os.walk와 같은 형태로 캐시를 순회 (dirs 목록 수정으로 가지치기 가능)"""
+        stack = [os.path.abspath(top)]
+        while stack:
+            current = stack.pop()
+            with self._lock:
+                names = self.children.get(current)
+                if names is None:
+                    continue
+                dirs, files = [], []
+                for name in names:
+                    entry = self.entries.get(os.path.join(current, name))
+                    if entry is not None:
+                        (dirs if entry["is_directory"] else files).append(name)
+            yield current, dirs, files
+            stack.extend(os.path.join(current, d) for d in reversed(dirs))
+    
+    # ---- 갱신 ----
+    
+    def _make_entry(self, path: str, stat: os.stat_result, is_dir: bool) -> Dict[str, Any]:
+        return {
+            "name": os.path.basename(path),
+            "path": path,
+            "size": stat.st_size,
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "is_directory": is_dir,
+            "mime_type": guess_mime_type(path)
+        }
+    
+    def _store(self, path: str, stat: os.stat_result, is_dir: bool) -> Optional[str]:
+        """항목 저장 후 변경 종류 반환 (변경 없으면 None)"""
+        stamp = (stat.st_mtime_ns, stat.st_size, is_dir)
+        previous = self.stamps.get(path)
+        if previous == stamp:
+            return None
+        self.entries[path] = self._make_entry(path, stat, is_dir)
+        self.stamps[path] = stamp
+        parent = os.path.dirname(path)
+        siblings = self.children.get(parent)
+        if siblings is not None:
+            name = os.path.basename(path)
+            index = bisect.bisect_left(siblings, name)
+            if index == len(siblings) or siblings[index] != name:
+                siblings.insert(index, name)
+        if is_dir:
+            self.children.setdefault(path, [])
+        return "modified" if previous else "created"
+    
+    def _scan(self, top: str, watch: bool, events: List[tuple] = None, seen: set = None) -> bool:
+        """top 아래를 스캔해 캐시에 반영 (모든 감시 등록 성공 여부 반환)"""
+        watched = True
+        stack = [top]
+        
+        with self._lock:
+            try:
+                kind = self._store(top, os.stat(top), True)
+            except OSError:
+                return False
+            if kind and events is not None:
+                events.append((top, kind))
+            if seen is not None:
+                seen.add(top)
+        
+        while stack:
+            current = stack.pop()
+            # 스캔 도중 생긴 변경을 놓치지 않도록 감시를 먼저 등록
+            if watch and watched and not self._watcher.add_watch(current):
+                logger.warning(f"inotify 감시 등록 실패, 폴링으로 전환: {current}")
+                watched = False
+            try:
+                with os.scandir(current) as it:
+                    scanned = []
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            if is_dir and entry.name in self.excluded_dirs:
+                                continue
+                            scanned.append((entry.path, entry.stat(), is_dir))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            
+            with self._lock:
+                self.children.setdefault(current, [])
+                for path, stat, is_dir in scanned:
+                    kind = self._store(path, stat, is_dir)
+                    if kind and events is not None:
+                        events.append((path, kind))
+                    if seen is not None:
+                        seen.add(path)
+                    if is_dir:
+                        stack.append(path)
+        
+        return watch and watched
+    
+    def _remove(self, path: str, events: List[tuple]):
+        """항목과 하위 항목 제거"""
+        with self._lock:
+            stack = [path]
+            while stack:
+                current = stack.pop()
+                if self.entries.pop(current, None) is None:
+                    continue
+                self.stamps.pop(current, None)
+                for name in self.children.pop(current, ()):
+                    stack.append(os.path.join(current, name))
+                events.append((current, "deleted"))
+            siblings = self.children.get(os.path.dirname(path))
+            if siblings is not None:
+                name = os.path.basename(path)
+                index = bisect.bisect_left(siblings, name)
+                if index < len(siblings) and siblings[index] == name:
+                    del siblings[index]
+    
+    def refresh_path(self, path: str):
+        """단일 경로를 다시 stat해서 반영 (쓰기 직후 등 즉시 갱신이 필요할 때)"""
+        path = os.path.abspath(path)
+        if self._root_of(path) is None:
+            return
+        events: List[tuple] = []
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._remove(path, events)
+        else:
+            is_dir = os.path.isdir(path) and not os.path.islink(path)
+            if is_dir and os.path.basename(path) in self.excluded_dirs:
+                return
+            if is_dir and path not in self.children:
+                watch = self.roots.get(self._root_of(path)) == "inotify"
+                self._scan(path, watch=watch, events=events)
+            else:
+                with self._lock:
+                    kind = self._store(path, stat, is_dir)
+                if kind:
+                    events.append((path, kind))
+        self._emit(events)
+    
+    def _on_inotify_event(self, directory: Optional[str], name: str, mask: int):
+        if mask & InotifyWatcher.IN_Q_OVERFLOW:
+            logger.warning("inotify 이벤트 큐 넘침, 전체 재동기화합니다")
+            for root in list(self.roots):
+                self._resync(root)
+            return
+        
+        path = os.path.join(directory, name) if name else directory
+        if (mask & InotifyWatcher.IN_ISDIR) and name in self.excluded_dirs:
+            return
+        
+        events: List[tuple] = []
+        if mask & (InotifyWatcher.IN_DELETE | InotifyWatcher.IN_MOVED_FROM):
+            self._remove(path, events)
+        elif mask & (InotifyWatcher.IN_CREATE | InotifyWatcher.IN_MOVED_TO) and mask & InotifyWatcher.IN_ISDIR:
+            self._scan(path, watch=True, events=events)
+        else:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._remove(path, events)
+            else:
+                with self._lock:
+                    kind = self._store(path, stat, bool(mask & InotifyWatcher.IN_ISDIR))
+                if kind:
+                    events.append((path, kind))
+        
+        # 항목 추가/삭제로 바뀐 부모 디렉토리 정보 갱신
+        if name and directory in self.entries:
+            try:
+                with self._lock:
+                    self._store(directory, os.stat(directory), True)
+            except OSError:
+                pass
+        self._emit(events)
+    
+    def _resync(self, root: str):
+        """루트 전체를 다시 스캔해 캐시와의 차이를 반영"""
+        events: List[tuple] = []
+        seen: set = set()
+        self._scan(root, watch=self.roots.get(root) == "inotify", events=events, seen=seen)
+        
+        # 스캔에서 발견되지 않은 항목은 삭제된 것
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            stale = [p for p in self.entries if p.startswith(prefix) and p not in seen]
+            for path in stale:
+                if path in self.entries:
+                    self._remove(path, events)
+        self._emit(events)
+    
+    def _poll(self, root: str):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._resync(root)
+            except Exception as e:
+                logger.error(f"메타데이터 폴링 오류: {e}")
+    
+    def _emit(self, events: List[tuple]):
+        for path, kind in events:
+            for listener in self.listeners:
+                try:
+                    listener(path, kind)
+                except Exception as e:
+                    logger.error(f"캐시 리스너 오류: {e}")
+    
+    def close(self):
+        self._stop.set()
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+
+# 도구 결과 인코딩 (initialize에서 세션별로 협상, 선호 순서대로)
+RESULT_ENCODINGS = ["json"]
+if zstandard is not None:
+    RESULT_ENCODINGS.insert(0, "json+zstd")
+if msgpack is not None:
+    RESULT_ENCODINGS.insert(0, "msgpack")
+    if zstandard is not None:
+        RESULT_ENCODINGS.insert(0, "msgpack+zstd")
+
+# 현재 요청의 결과 인코딩 (워커 스레드로 컨텍스트가 복사되어 전달됨)
+result_encoding: contextvars.ContextVar = contextvars.ContextVar("result_encoding", default="json")
+
+COMPRESS_MIN_BYTES = 1024
+_zstd_local = threading.local()
+
+def negotiate_result_encoding(accepted: Optional[List[str]]) -> str:
+    """클라이언트가 받는 인코딩 중 서버가 지원하는 첫 번째 (없으면 json)"""
+    for encoding in accepted or []:
+        if encoding in RESULT_ENCODINGS:
+            return encoding
+    return "json"
+
+def dumps_compact(data: Any) -> str:
+    """들여쓰기 없는 JSON 직렬화"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def encode_result_data(data: Any, encoding: str = None) -> Dict[str, Any]:
+    """구조화된 결과를 협상된 인코딩으로 직렬화
+
+    json은 {"text": ...}, 나머지는 base64 {"blob": ...}와 mimeType을 반환하고,
+    압축한 경우에만 contentEncoding을 붙입니다.
+    """
+    encoding = encoding or result_encoding.get()
+    if encoding == "json":
+        return {"mimeType": "application/json", "text": dumps_compact(data)}
+    
+    if encoding.startswith("msgpack"):
+        raw = msgpack.packb(data, use_bin_type=True)
+        encoded = {"mimeType": "application/msgpack"}
+    else:
+        raw = dumps_compact(data).encode("utf-8")
+        encoded = {"mimeType": "application/json"}
+    
+    if encoding.endswith("+zstd") and len(raw) >= COMPRESS_MIN_BYTES:
+        compressor = getattr(_zstd_local, "compressor", None)
+        if compressor is None:
+            compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=3)
+        raw = compressor.compress(raw)
+        encoded["contentEncoding"] = "zstd"
+    
+    encoded["blob"] = base64.b64encode(raw).decode("ascii")
+    return encoded
+
+class LatencyHistogram:
+    """HDR 방식 로그-선형 지연 시간 히스토그램 (마이크로초 단위)
+
+    64 미만은 1 단위, 그 이상은 2의 거듭제곱 구간마다 32개 버킷으로 나누므로
+    기록 값의 상대 오차는 약 3% 이내이고, 메모리는 쓰인 버킷 수에만 비례합니다.
+    """
+    
+    SUB_BUCKETS = 32
+    
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+    
+    @classmethod
+    def _index(cls, value: int) -> int:
+        if value < 2 * cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - 6
+        return 2 * cls.SUB_BUCKETS + (shift - 1) * cls.SUB_BUCKETS + (value >> shift) - cls.SUB_BUCKETS
+    
+    @classmethod
+    def _upper(cls, index: int) -> int:
+        """버킷이 나타내는 가장 큰 값"""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        offset = index - 2 * cls.SUB_BUCKETS
+        shift = offset // cls.SUB_BUCKETS + 1
+        return ((offset % cls.SUB_BUCKETS + cls.SUB_BUCKETS + 1) << shift) - 1
+    
+    def record(self, value: int):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def percentile(self, percent: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper(index), self.max)
+        return self.max
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "min": self.min or 0,
+            "mean": round(self.total / self.count, 1) if self.count else 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max
+        }
+
+class RequestStats:
+    """요청 하나 동안 처리기가 누적하는 카운터 (워커 스레드에서도 갱신)"""
+    
+    __slots__ = ("counts", "_lock")
+    
+    def __init__(self):
+        self.counts = {"files_touched": 0, "cache_hits": 0, "cache_misses": 0}
+        self._lock = threading.Lock()
+    
+    def add(self, **counts: int):
+        with self._lock:
+            for name, value in counts.items():
+                self.counts[name] = self.counts.get(name, 0) + value
+
+# 현재 요청의 카운터 (워커 스레드로 컨텍스트가 복사되어 전달됨)
+request_stats: contextvars.ContextVar = contextvars.ContextVar("request_stats", default=None)
+
+def record_request(**counts: int):
+    """현재 요청 카운터에 더하기 (요청 밖에서 호출되면 무시)"""
+    stats = request_stats.get()
+    if stats is not None:
+        stats.add(**counts)
+
+class ServerMetrics:
+    """JSON-RPC 메서드/도구별 지연 시간 히스토그램과 바이트/파일/캐시 카운터
+
+    이벤트 루프 스레드에서만 기록하며, opentelemetry가 설치되어 있으면
+    요청마다 스팬도 만듭니다 (MCP_OTEL=0으로 끔).
+    """
+    
+    def __init__(self):
+        self.started = time.time()
+        self.methods: Dict[str, Dict[str, Any]] = {}
+        self.tracer = None
+        if otel_trace is not None and os.environ.get("MCP_OTEL", "1") != "0":
+            self.tracer = otel_trace.get_tracer("mcp-filesystem-server")
+    
+    def span(self, name: str):
+        if self.tracer is None:
+            return contextlib.nullcontext()
+        return self.tracer.start_as_current_span(name)
+    
+    def observe(self, key: str, elapsed: float, error: bool, stats: RequestStats,
+                bytes_in: int, bytes_out: int):
+        entry = self.methods.get(key)
+        if entry is None:
+            entry = self.methods[key] = {
+                "latency_us": LatencyHistogram(), "errors": 0,
+                "bytes_in": 0, "bytes_out": 0,
+                "files_touched": 0, "cache_hits": 0, "cache_misses": 0
+            }
+        entry["latency_us"].record(elapsed * 1_000_000)
+        entry["errors"] += int(error)
+        entry["bytes_in"] += bytes_in
+        entry["bytes_out"] += bytes_out
+        for name, value in stats.counts.items():
+            entry[name] = entry.get(name, 0) + value
+    
+    def snapshot(self) -> Dict[str, Any]:
+        methods = {}
+        for key, entry in sorted(self.methods.items()):
+            methods[key] = {
+                name: value.to_dict() if isinstance(value, LatencyHistogram) else value
+                for name, value in entry.items()
+            }
+        return {"uptime_seconds": round(time.time() - self.started, 1), "methods": methods}
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """페이지 위치를 불투명한 커서 문자열로 인코딩"""
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """커서 문자열 디코딩"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("유효하지 않은 커서입니다")
+    if not isinstance(state, dict):
+        raise ValueError("유효하지 않은 커서입니다")
+    return state
+
+class FileRangeReader:
+    """mmap 기반 부분 읽기 (파일 전체를 메모리에 올리지 않음)
+
+    잘라낸 구간이 UTF-8 멀티바이트 문자 중간에서 끝나지 않도록
+    끝 위치를 문자 경계로 맞춥니다.
+    """
+    
+    def __init__(self, path: str):
+        record_request(files_touched=1)
+        self._file = open(path, 'rb')
+        self.stat = os.fstat(self._file.fileno())
+        self.size = self.stat.st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+    
+    def _char_boundary(self, start: int, end: int) -> int:
+        """end가 문자 중간이면 문자 시작 위치로 당김"""
+        pos = end
+        while pos > start and pos < self.size and (self._mm[pos] & 0xC0) == 0x80:
+            pos -= 1
+        return pos if pos > start else end
+    
+    def read_bytes(self, offset: int, length: int, unit: int = 1) -> Tuple[bytes, int]:
+        """offset부터 최대 length 바이트 (데이터, 다음 위치)
+
+        unit=1은 UTF-8 문자 경계, 2/4는 UTF-16/32 코드 단위에 맞추며
+        0이면 경계를 맞추지 않습니다.
+        """
+        offset = max(0, min(offset, self.size))
+        if unit > 1:
+            offset -= offset % unit
+            length -= length % unit
+        end = min(self.size, offset + max(length, 0))
+        if end < self.size and unit == 1:
+            end = self._char_boundary(offset, end)
+        return (self._mm[offset:end] if self._mm else b""), end
+    
+    def line_offset(self, line: int) -> int:
+        """1부터 시작하는 줄 번호의 시작 바이트 위치"""
+        pos = 0
+        for _ in range(max(line, 1) - 1):
+            newline = self._mm.find(b"\n", pos) if self._mm else -1
+            if newline == -1:
+                return self.size
+            pos = newline + 1
+        return pos
+    
+    def read_lines(self, offset: int, line: int, end_line: Optional[int],
+                   max_bytes: int) -> Tuple[bytes, int, int]:
+        """offset(line번째 줄)부터 end_line까지 줄 단위로 읽기 (데이터, 다음 위치, 다음 줄 번호)"""
+        limit = min(self.size, offset + max_bytes)
+        pos, current = offset, line
+        while pos < self.size and (end_line is None or current <= end_line):
+            newline = self._mm.find(b"\n", pos)
+            line_end = self.size if newline == -1 else newline + 1
+            if line_end > limit:
+                if pos == offset:
+                    # 한 줄이 한도보다 길면 줄 중간에서 자름
+                    data, end = self.read_bytes(offset, max_bytes)
+                    return data, end, current
+                break
+            pos, current = line_end, current + 1
+        return (self._mm[offset:pos] if self._mm else b""), pos, current
+    
+    def iter_chunks(self, chunk_size: int, offset: int = 0):
+        """offset부터 chunk_size 단위로 (위치, 데이터) 생성"""
+        while offset < self.size:
+            data, end = self.read_bytes(offset, chunk_size)
+            yield offset, data
+            offset = end
+    
+    def digest(self) -> str:
+        """파일 전체 내용의 해시 (mmap을 그대로 넘겨 복사 없이 계산)"""
+        h = hashlib.blake2b(digest_size=16)
+        if self._mm is not None:
+            h.update(self._mm)
+        return h.hexdigest()
+
+class StatKeyedCache:
+    """파일별 계산 결과 캐시 (LRU)
+
+    (inode, mtime, 크기)를 함께 저장해 두고 같을 때만 재사용하므로
+    파일이 바뀌면 다음 조회에서 자동으로 다시 계산됩니다.
+    """
+    
+    def __init__(self, max_entries: int = 65536):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[tuple, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def _stamp(st: os.stat_result) -> tuple:
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def _lookup(self, path: str, stamp: tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                self.counters["hits"] += 1
+                hit = True
+            else:
+                self.counters["misses"] += 1
+                hit = False
+        record_request(**{"cache_hits" if hit else "cache_misses": 1})
+        return entry[1] if hit else None
+    
+    def _store(self, path: str, stamp: tuple, value: Any):
+        with self._lock:
+            self._entries[path] = (stamp, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, path: str, kind: str = None):
+        """항목 제거 (메타데이터 캐시 리스너로는 삭제 이벤트만 반영, 수정은 stamp로 검출)"""
+        if kind not in (None, "deleted"):
+            return
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), **self.counters}
+
+class ContentHashCache(StatKeyedCache):
+    """파일 내용 해시(ETag) 캐시
+
+    내용 해시는 파일 전체를 읽어야 하므로 필요할 때만(strong) 계산하고, 그 밖에는
+    메타데이터 기반 약한 ETag(W/...)를 사용합니다. max_hash_bytes보다 큰 파일은
+    항상 약한 ETag입니다.
+    """
+    
+    def __init__(self, max_entries: int = 65536, max_hash_bytes: int = 256 * 1024 * 1024):
+        super().__init__(max_entries)
+        self.max_hash_bytes = max_hash_bytes
+    
+    @classmethod
+    def weak_tag(cls, reader: FileRangeReader) -> str:
+        """(inode, mtime, 크기) 기반 약한 ETag (내용을 읽지 않음)"""
+        return "W/{:x}-{:x}-{:x}".format(*cls._stamp(reader.stat))
+    
+    def etag(self, path: str, reader: FileRangeReader, strong: bool = True) -> str:
+        """열린 파일의 ETag
+
+        strong이면 내용 해시(캐시에 없거나 파일이 바뀌었으면 계산), 아니면 캐시에
+        이미 있는 내용 해시나 약한 ETag를 반환합니다.
+        """
+        path = os.path.abspath(path)
+        stamp = self._stamp(reader.stat)
+        tag = self._lookup(path, stamp)
+        if tag is None:
+            if not strong or reader.size > self.max_hash_bytes:
+                return self.weak_tag(reader)
+            tag = reader.digest()
+            self._store(path, stamp, tag)
+        return tag
+    
+    def prime(self, path: str, data: bytes):
+        """방금 쓴 내용으로 해시를 미리 채움 (쓰기 직후 읽기에서 재계산 방지)"""
+        if len(data) > self.max_hash_bytes:
+            return
+        try:
+            stamp = self._stamp(os.stat(path))
+        except OSError:
+            return
+        if stamp[2] == len(data):
+            self._store(os.path.abspath(path), stamp, hashlib.blake2b(data, digest_size=16).hexdigest())
+
+@functools.lru_cache(maxsize=1024)
+def _mime_for_extension(ext: str) -> Optional[str]:
+    return mimetypes.guess_type("file" + ext)[0]
+
+def guess_mime_type(path: str, default: str = "application/octet-stream") -> str:
+    """확장자 기준 MIME 타입 (확장자별로 한 번만 계산)"""
+    return _mime_for_extension(os.path.splitext(path)[1].lower()) or default
+
+# BOM이 있으면 인코딩 확정 (UTF-32 LE BOM이 UTF-16 LE BOM으로 시작하므로 먼저 검사)
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"), (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+_TEXT_CONTROL = set(b"\t\n\r\f\b\x1b")
+
+def sniff_encoding(head: bytes, complete: bool = False) -> Optional[str]:
+    """파일 앞부분으로 텍스트 인코딩 추정 (바이너리로 보이면 None)
+
+    complete는 head가 파일 전체인지 여부로, 아니면 끝에서 잘린
+    멀티바이트 문자를 오류로 보지 않습니다.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if b"\0" in head:
+        return None
+    for encoding in ("utf-8", "cp949"):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(head, final=complete)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    controls = sum(1 for byte in head if byte < 0x20 and byte not in _TEXT_CONTROL)
+    return "latin-1" if controls * 10 < len(head) else None
+
+class FileTypeCache(StatKeyedCache):
+    """파일 분류(바이너리 여부, 인코딩, MIME) 캐시 (앞 sniff_bytes만 검사)"""
+    
+    def __init__(self, max_entries: int = 65536, sniff_bytes: int = 4096):
+        super().__init__(max_entries)
+        self.sniff_bytes = sniff_bytes
+    
+    def classify(self, path: str, reader: FileRangeReader) -> Dict[str, Any]:
+        path = os.path.abspath(path)
+        stamp = self._stamp(reader.stat)
+        info = self._lookup(path, stamp)
+        if info is None:
+            head = reader.read_bytes(0, self.sniff_bytes, unit=0)[0]
+            encoding = sniff_encoding(head, complete=reader.size <= self.sniff_bytes)
+            info = {
+                "binary": encoding is None,
+                "encoding": encoding,
+                "mime_type": guess_mime_type(path, "application/octet-stream" if encoding is None else "text/plain")
+            }
+            self._store(path, stamp, info)
+        return info
+
+class DirectoryListingCache(StatKeyedCache):
+    """메타데이터 캐시 밖 디렉토리의 정렬된 (이름, 디렉토리 여부) 목록 캐시
+
+    디렉토리 mtime이 같으면 재사용하므로 페이지마다 디렉토리 전체를 다시
+    읽지 않습니다.
+    """
+    
+    def __init__(self, max_entries: int = 1024):
+        super().__init__(max_entries)
+    
+    def entries(self, directory: str) -> List[Tuple[str, bool]]:
+        directory = os.path.abspath(directory)
+        stamp = self._stamp(os.stat(directory))
+        listing = self._lookup(directory, stamp)
+        if listing is None:
+            with os.scandir(directory) as it:
+                listing = sorted((entry.name, entry.is_dir(follow_symlinks=False)) for entry in it)
+            self._store(directory, stamp, listing)
+        return listing
+    
+    def page(self, directory: str, after: str = None, limit: int = None,
+             skip: Iterable[str] = ()) -> List[str]:
+        """after 다음 이름부터 skip을 빼고 최대 limit개 (MetadataCache.list_dir와 같은 형태)"""
+        listing = self.entries(directory)
+        start = bisect.bisect_right(listing, (after, True)) if after is not None else 0
+        selected = (name for name, _ in itertools.islice(listing, start, None) if name not in skip)
+        return list(itertools.islice(selected, limit))
+
+# 새 파일 권한 계산용 umask (스레드가 생기기 전인 임포트 시점에 한 번 읽음)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def fsync_directory(directory: str):
+    """디렉토리 항목(생성/이름 변경)을 디스크에 반영 (지원하지 않는 플랫폼은 무시)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_files_atomic(entries: List[Tuple[str, bytes, str]], durable: bool = True) -> List[Dict[str, Any]]:
+    """(경로, 데이터, 모드) 목록을 한 번에 기록
+
+    overwrite 모드는 같은 디렉토리의 임시 파일에 쓴 뒤 os.replace로 교체하므로
+    동시에 읽는 쪽은 이전 내용이나 새 내용 중 하나만 봅니다. append 모드는
+    O_APPEND로 이어 씁니다. 모든 임시 파일을 먼저 쓰고 교체하며, durable이면
+    파일별 fsync 후 디렉토리마다 한 번만 fsync합니다. 교체 단계 자체는
+    파일 단위로 원자적이며 묶음 전체가 하나의 트랜잭션은 아닙니다.
+    경로가 심볼릭 링크이면 링크를 파일로 바꾸지 않고 가리키는 파일에 씁니다.
+    """
+    staged: List[Tuple[str, str, str]] = []  # (실제 경로, 임시 경로, 모드)
+    results = []
+    try:
+        for path, data, mode in entries:
+            target = os.path.realpath(path)
+            directory = os.path.dirname(target) or "."
+            os.makedirs(directory, exist_ok=True)
+            if mode == "append":
+                fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+                tmp_path = None
+            else:
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=directory, prefix="." + os.path.basename(target) + ".", suffix=".tmp"
+                )
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                if durable:
+                    os.fsync(fd)
+                if tmp_path is not None:
+                    try:
+                        os.chmod(tmp_path, os.stat(target).st_mode & 0o7777)
+                    except FileNotFoundError:
+                        # 새 파일은 open()으로 만든 것처럼 umask 적용
+                        os.chmod(tmp_path, 0o666 & ~_UMASK)
+            finally:
+                os.close(fd)
+            staged.append((target, tmp_path, mode))
+            results.append({"path": path, "bytes": len(data), "mode": mode})
+        
+        for target, tmp_path, _ in staged:
+            if tmp_path is not None:
+                os.replace(tmp_path, target)
+        staged = []
+    finally:
+        for _, tmp_path, _ in staged:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
+    if durable:
+        for directory in {os.path.dirname(os.path.realpath(path)) or "." for path, _, _ in entries}:
+            fsync_directory(directory)
+    return results
+
+def iter_sorted_files(top: str, list_entries: Callable[[str], List[Tuple[str, bool]]],
+                      after: Iterable[str] = ()) -> Iterator[str]:
+    """이름순 깊이 우선으로 파일 경로 생성 (after 경로 다음부터 재개)
+
+    list_entries(디렉토리)는 이름순 (이름, 디렉토리 여부) 목록을 반환해야 합니다.
+    after는 top 기준 상대 경로의 구성요소로, 그 경로가 지금 없더라도
+    순서상 다음 위치부터 이어 갑니다. 스택에는 깊이만큼의 목록만 유지됩니다.
+    """
+    def walk(directory: str, after: Tuple[str, ...]) -> Iterator[str]:
+        for name, is_dir in list_entries(directory):
+            if after:
+                if name < after[0]:
+                    continue
+                if name == after[0]:
+                    if is_dir and len(after) > 1:
+                        yield from walk(os.path.join(directory, name), after[1:])
+                    continue
+                after = ()
+            path = os.path.join(directory, name)
+            if is_dir:
+                yield from walk(path, ())
+            else:
+                yield path
+    
+    yield from walk(top, tuple(after))
+
+def iter_matching_files(top: str, name_pattern: str, excluded_dirs: set,
+                        extensions: set) -> Iterator[str]:
+    """파일명이 name_pattern(fnmatch)과 일치하는 파일을 지연 생성
+
+    순회 중에 제외 디렉토리를 가지치기하고 확장자를 거르므로, 소비자가
+    필요한 만큼만 꺼내면 나머지 트리는 방문하지 않습니다. glob과 같이
+    숨김 파일/디렉토리는 건너뛰며, 심볼릭 링크 디렉토리는 따라가지 않습니다.
+    """
+    match = re.compile(fnmatch.translate(name_pattern)).match
+    stack = [top]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in excluded_dirs:
+                        subdirs.append(entry.path)
+                elif (match(name) and os.path.splitext(name)[1].lower() in extensions
+                        and entry.is_file()):
+                    yield entry.path
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+def build_content_regex(mode: str, patterns: List[str], case_sensitive: bool = False) -> "re.Pattern":
+    """검색 모드에 맞는 정규식 생성
+
+    - substring: 단일 리터럴
+    - multi: 여러 리터럴을 하나의 교대(alternation) 패턴으로 묶어 한 번에 탐색
+    - regex: 사용자 정규식 그대로
+    """
+    flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+    if mode == "regex":
+        try:
+            return re.compile(patterns[0], flags)
+        except re.error as e:
+            raise ValueError(f"잘못된 정규식입니다: {e}")
+    if mode not in ("substring", "multi"):
+        raise ValueError(f"지원하지 않는 검색 모드: {mode}")
+    # 긴 리터럴을 먼저 두어 겹치는 패턴 중 가장 긴 것이 잡히도록 함
+    literals = sorted(set(patterns), key=len, reverse=True)
+    return re.compile("|".join(re.escape(p) for p in literals), flags)
+
+def grep_file(path: str, regex: "re.Pattern", max_matches: int = 5,
+              chunk_size: int = 64 * 1024, snippet_chars: int = 200,
+              max_line_chars: int = 1024 * 1024) -> List[Dict[str, Any]]:
+    """파일을 고정 크기 청크로 읽으며 일치하는 줄 번호와 내용 반환
+
+    파일 전체나 소문자 사본을 만들지 않고, 청크의 완결된 줄 구간에
+    정규식을 직접 적용합니다. 한 줄에는 한 번만 일치를 기록하며,
+    max_line_chars보다 긴 줄은 잘라서 검사합니다.
+    """
+    matches: List[Dict[str, Any]] = []
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    line_no = 1
+    last_reported = 0
+    
+    with open(path, 'rb') as f:
+        while len(matches) < max_matches:
+            chunk = f.read(chunk_size)
+            text = pending + decoder.decode(chunk, final=not chunk)
+            if chunk:
+                cut = text.rfind("\n") + 1
+                if cut == 0 and len(text) < max_line_chars:
+                    # 아직 줄이 끝나지 않음 (너무 긴 줄은 잘라서 검사)
+                    pending = text
+                    continue
+                body, pending = (text[:cut], text[cut:]) if cut else (text, "")
+            else:
+                body, pending = text, ""
+            
+            pos, counted_pos = 0, 0
+            while len(matches) < max_matches:
+                found = regex.search(body, pos)
+                if found is None:
+                    break
+                line_start = body.rfind("\n", 0, found.start()) + 1
+                line_end = body.find("\n", found.start())
+                if line_end == -1:
+                    line_end = len(body)
+                line_no += body.count("\n", counted_pos, line_start)
+                counted_pos = line_start
+                pos = line_end + 1
+                if line_no == last_reported:
+                    continue
+                last_reported = line_no
+                
+                line = body[line_start:line_end].rstrip("\r")
+                if len(line) > snippet_chars:
+                    start = max(0, found.start() - line_start - snippet_chars // 2)
+                    line = line[start:start + snippet_chars]
+                matches.append({"line": line_no, "text": line, "match": found.group(0)})
+            
+            line_no += body.count("\n", counted_pos)
+            if not chunk:
+                break
+    return matches
+
+def grep_files(paths: List[str], regex_source: str, flags: int,
+               max_matches: int) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """여러 파일에 grep_file 적용 (일치한 파일만 반환)
+
+    프로세스 풀에서 실행될 수 있도록 컴파일된 정규식 대신 원본과 플래그를 받습니다.
+    """
+    regex = re.compile(regex_source, flags)
+    results = []
+    for path in paths:
+        try:
+            matches = grep_file(path, regex, max_matches)
+        except OSError:
+            continue
+        if matches:
+            results.append((path, matches))
+    return results
+
+class TreeStats:
+    """디렉토리 순회 통계 누적기
+
+    가장 큰 파일은 크기 top_n의 최소 힙으로만 유지하므로 파일 수와
+    무관하게 메모리 사용량이 일정합니다. 워커별 누적기를 merge로 합칩니다.
+    """
+    
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.total_files = 0
+        self.total_directories = 0
+        self.total_size = 0
+        self.file_types: Dict[str, int] = {}
+        self._largest: List[tuple] = []
+    
+    def add_file(self, path: str, name: str, size: int):
+        ext = os.path.splitext(name)[1].lower() or "no_extension"
+        self.total_files += 1
+        self.total_size += size
+        self.file_types[ext] = self.file_types.get(ext, 0) + 1
+        if len(self._largest) < self.top_n:
+            heapq.heappush(self._largest, (size, path))
+        elif size > self._largest[0][0]:
+            heapq.heapreplace(self._largest, (size, path))
+    
+    def merge(self, other: "TreeStats"):
+        self.total_files += other.total_files
+        self.total_directories += other.total_directories
+        self.total_size += other.total_size
+        for ext, count in other.file_types.items():
+            self.file_types[ext] = self.file_types.get(ext, 0) + count
+        for item in other._largest:
+            if len(self._largest) < self.top_n:
+                heapq.heappush(self._largest, item)
+            elif item > self._largest[0]:
+                heapq.heapreplace(self._largest, item)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_files": self.total_files,
+            "total_directories": self.total_directories,
+            "total_size": self.total_size,
+            "file_types": self.file_types,
+            "largest_files": [
+                {"path": path, "size": size}
+                for size, path in sorted(self._largest, reverse=True)
+            ]
+        }
+
+def walk_tree_stats(top: str, excluded_dirs: set, pool: ThreadPoolExecutor = None,
+                    helpers: int = 0, top_n: int = 10, dir_mtimes: Dict[str, int] = None) -> TreeStats:
+    """os.scandir 기반 병렬 디렉토리 순회 통계
+
+    방문할 디렉토리를 공유 스택에 넣고 호출 스레드와 helpers개의 풀 스레드가
+    나눠 처리합니다. 호출 스레드도 직접 일하므로 풀이 바빠도 완료가 보장됩니다.
+    dir_mtimes를 넘기면 방문한 디렉토리의 mtime(ns)을 기록합니다.
+    """
+    if dir_mtimes is not None:
+        try:
+            dir_mtimes[top] = os.stat(top).st_mtime_ns
+        except OSError:
+            pass
+    stack = [top]
+    outstanding = [1]  # 스택에 있거나 처리 중인 디렉토리 수
+    cond = threading.Condition()
+    
+    def scan(directory: str, stats: TreeStats) -> List[str]:
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        # os.walk와 같이 심볼릭 링크 디렉토리는 세되 따라가지 않음
+                        if entry.is_dir():
+                            if entry.name not in excluded_dirs:
+                                stats.total_directories += 1
+                                if not entry.is_symlink():
+                                    subdirs.append(entry.path)
+                                    if dir_mtimes is not None:
+                                        dir_mtimes[entry.path] = entry.stat().st_mtime_ns
+                        else:
+                            stats.add_file(entry.path, entry.name, entry.stat().st_size)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return subdirs
+    
+    def work() -> TreeStats:
+        stats = TreeStats(top_n)
+        while True:
+            with cond:
+                while not stack and outstanding[0] > 0:
+                    cond.wait()
+                if not stack:
+                    return stats
+                directory = stack.pop()
+            subdirs = scan(directory, stats)
+            with cond:
+                stack.extend(subdirs)
+                outstanding[0] += len(subdirs) - 1
+                if subdirs or outstanding[0] == 0:
+                    cond.notify_all()
+    
+    futures = [pool.submit(work) for _ in range(helpers)] if pool is not None else []
+    total = work()
+    for future in futures:
+        total.merge(future.result())
+    return total
+
+class ResultCache:
+    """도구 결과 캐시 (LRU, 항목 수/바이트 제한)
+
+    각 항목은 영향을 받는 경로 범위(scope)를 가지며, 그 아래에서 변경이
+    감지되면 invalidate_path로 제거됩니다. 감시되지 않는 경로의 결과는
+    validator(예: 디렉토리 mtime 비교)가 False를 반환하면 버립니다.
+    """
+    
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "invalidations": 0}
+    
+    @staticmethod
+    def make_key(tool: str, arguments: Dict[str, Any]) -> str:
+        return json.dumps([tool, arguments], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                record_request(cache_misses=1)
+                return None
+            value, scopes, size, validator = entry
+        
+        # validator는 파일 시스템에 접근할 수 있으므로 락 밖에서 실행
+        if validator is not None and not validator():
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._drop(key)
+                self.counters["stale"] += 1
+                self.counters["misses"] += 1
+            record_request(cache_misses=1)
+            return None
+        
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+        record_request(cache_hits=1)
+        return value
+    
+    def put(self, key: str, value: Any, scopes: List[str], size: int,
+            validator: Callable[[], bool] = None):
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, [s.rstrip(os.sep) or os.sep for s in scopes], size, validator)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+    
+    def _drop(self, key: str):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def invalidate_path(self, path: str, kind: str = None):
+        """path를 범위에 포함하는 항목 제거 (메타데이터 캐시 리스너로도 사용)"""
+        path = os.path.abspath(path)
+        with self._lock:
+            stale = [
+                key for key, (_, scopes, _, _) in self._entries.items()
+                if any(path == scope or path.startswith(scope + os.sep) or scope == os.sep
+                       for scope in scopes)
+            ]
+            for key in stale:
+                self._drop(key)
+            self.counters["invalidations"] += len(stale)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_ratio": round(self.counters["hits"] / lookups, 3) if lookups else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes
+            }
+
+def dir_mtime_validator(dir_mtimes: Dict[str, int]) -> Callable[[], bool]:
+    """기록된 디렉토리 mtime이 모두 그대로인지 확인하는 validator
+
+    디렉토리 mtime은 항목 추가/삭제/이름 변경 시에만 바뀌므로, 기존 파일의
+    내용만 바뀐 경우는 감지하지 못합니다 (감시 중인 루트는 이벤트로 무효화).
+    """
+    def validate() -> bool:
+        try:
+            return all(os.stat(path).st_mtime_ns == mtime for path, mtime in dir_mtimes.items())
+        except OSError:
+            return False
+    return validate
+
+def parse_env_mapping(name: str, cast: Callable[[str], Any] = int) -> Dict[str, Any]:
+    """"a=4,b=2" 형식의 환경 변수를 딕셔너리로 변환"""
+    mapping = {}
+    for item in os.environ.get(name, "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            mapping[key.strip()] = cast(value)
+    return mapping
+
+class ToolExecutor:
+    """블로킹 파일 시스템 작업을 워커 풀에서 실행
+
+    이벤트 루프를 막지 않도록 도구 핸들러를 스레드 풀에서 실행하고,
+    도구별 동시 실행 수를 제한합니다. process_workers를 지정하면 내용
+    검색처럼 CPU를 많이 쓰는 작업은 프로세스 풀에서 처리합니다.
+    스레드에서는 정규식 검사/디코딩이 GIL을 잡고 있어 파일 읽기만 겹치고
+    CPU 작업은 병렬로 실행되지 않습니다.
+    """
+    
+    DEFAULT_TOOL_LIMITS = {"search_files": 4, "file_stats": 2}
+    
+    def __init__(self, max_workers: int = None, process_workers: int = 0,
+                 tool_limits: Dict[str, int] = None, default_limit: int = 16,
+                 walk_workers: int = None):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.thread_pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="mcp-fs")
+        # 디렉토리 순회 보조 스레드 (도구 핸들러 풀과 분리해 교착 방지)
+        self.walk_workers = walk_workers if walk_workers is not None else min(8, os.cpu_count() or 1)
+        self.walk_pool = ThreadPoolExecutor(max(self.walk_workers, 1), thread_name_prefix="mcp-walk")
+        self.process_workers = process_workers
+        self.process_pool = None
+        if process_workers > 0:
+            # 감시 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+            self.process_pool = ProcessPoolExecutor(
+                process_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        self.tool_limits = {**self.DEFAULT_TOOL_LIMITS, **(tool_limits or {})}
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> "ToolExecutor":
+        """MCP_WORKER_THREADS, MCP_PROCESS_WORKERS, MCP_WALK_WORKERS, MCP_TOOL_CONCURRENCY 환경 변수로 생성
+
+        MCP_PROCESS_WORKERS 기본값은 CPU 수(최대 4)이고 CPU가 하나면 0입니다
+        (0이면 내용 검사가 순회 보조 스레드에서 실행되어 GIL 때문에 병렬화되지 않음).
+        MCP_TOOL_CONCURRENCY 형식: "search_files=4,file_stats=2"
+        """
+        cpus = os.cpu_count() or 1
+        return cls(
+            max_workers=int(os.environ.get("MCP_WORKER_THREADS", "0")) or None,
+            process_workers=int(os.environ.get("MCP_PROCESS_WORKERS", str(min(4, cpus) if cpus > 1 else 0))),
+            tool_limits=parse_env_mapping("MCP_TOOL_CONCURRENCY"),
+            walk_workers=int(os.environ["MCP_WALK_WORKERS"]) if "MCP_WALK_WORKERS" in os.environ else None
+        )
+    
+    def _tool_metrics(self, tool: str) -> Dict[str, int]:
+        metrics = self._metrics.get(tool)
+        if metrics is None:
+            metrics = self._metrics[tool] = {
+                "waiting": 0,         # 도구별 동시 실행 한도 대기
+                "queued": 0,          # 풀에 제출되었지만 아직 시작 전
+                "running": 0,
+                "completed": 0,
+                "failed": 0,
+                "max_queue_depth": 0,
+                "total_wait_ms": 0
+            }
+        return metrics
+    
+    def _adjust(self, metrics: Dict[str, int], **deltas: int):
+        with self._lock:
+            for key, delta in deltas.items():
+                metrics[key] += delta
+            depth = metrics["waiting"] + metrics["queued"]
+            if depth > metrics["max_queue_depth"]:
+                metrics["max_queue_depth"] = depth
+    
+    async def run(self, tool: str, func: Callable[..., Any], *args: Any) -> Any:
+        """func(*args)를 스레드 풀에서 실행 (도구별 동시 실행 한도 적용)"""
+        semaphore = self._semaphores.get(tool)
+        if semaphore is None:
+            limit = self.tool_limits.get(tool, self.default_limit)
+            semaphore = self._semaphores[tool] = asyncio.Semaphore(limit)
+        metrics = self._tool_metrics(tool)
+        submitted = time.monotonic()
+        
+        def worker():
+            self._adjust(metrics, queued=-1, running=1,
+                         total_wait_ms=int((time.monotonic() - submitted) * 1000))
+            try:
+                return func(*args)
+            finally:
+                self._adjust(metrics, running=-1)
+        
+        self._adjust(metrics, waiting=1)
+        async with semaphore:
+            self._adjust(metrics, waiting=-1, queued=1)
+            # 요청 단위 컨텍스트(contextvars)를 워커 스레드로 전달
+            context = contextvars.copy_context()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.thread_pool, context.run, worker
+                )
+            except BaseException:
+                self._adjust(metrics, failed=1)
+                raise
+            self._adjust(metrics, completed=1)
+            return result
+    
+    def map_batches(self, func: Callable[..., List[Any]], items: Iterable[Any],
+                    *args: Any, batch_size: int = 32) -> Iterator[List[Any]]:
+        """items를 batch_size씩 묶어 func(batch, *args)를 실행하고 결과를 순서대로 생성
+
+        프로세스 풀이 있으면 그곳에, 없으면 순회 보조 스레드 풀에 여러 배치를
+        동시에 제출하며, 소비자가 중간에 멈추면(예: 최대 결과 수 도달) 남은
+        배치는 취소합니다. 스레드 풀에서는 func가 GIL을 놓는 동안(파일 읽기)만
+        겹쳐 실행되므로 CPU를 쓰는 검사는 프로세스 풀이 있어야 빨라집니다.
+        """
+        iterator = iter(items)
+        batches = iter(lambda: list(itertools.islice(iterator, batch_size)), [])
+        pool, workers = self.process_pool, self.process_workers
+        if pool is None:
+            pool, workers = self.walk_pool, self.walk_workers
+        if workers <= 1:
+            for batch in batches:
+                yield func(batch, *args)
+            return
+        
+        pending = deque()
+        try:
+            for batch in batches:
+                pending.append(pool.submit(func, batch, *args))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """풀 설정과 도구별 지표"""
+        with self._lock:
+            tools = {name: dict(metrics) for name, metrics in self._metrics.items()}
+        return {
+            "thread_workers": self.max_workers,
+            "process_workers": self.process_workers,
+            "walk_workers": self.walk_workers,
+            "tool_limits": dict(self.tool_limits),
+            "default_limit": self.default_limit,
+            "tools": tools
+        }
+    
+    def shutdown(self):
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        self.walk_pool.shutdown(wait=False, cancel_futures=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+class QuotaExceeded(Exception):
+    """클라이언트/도구 한도 초과로 요청을 즉시 거절"""
+    
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """초당 rate 바이트가 채워지는 바이트 예산 (사용 후 차감, 음수면 빚)"""
+    
+    def __init__(self, rate: float, burst_seconds: float = 10.0):
+        self.rate = rate
+        self.capacity = rate * burst_seconds
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def retry_after(self) -> float:
+        """예산이 남아 있으면 0, 빚이 있으면 회복까지 걸리는 초"""
+        self._refill()
+        return 0.0 if self.tokens > 0 else (1 - self.tokens) / self.rate
+    
+    def charge(self, amount: int):
+        self._refill()
+        self.tokens -= amount
+    
+    def full(self) -> bool:
+        """예산이 다 찼는지 (새로 만든 버킷과 같은 상태)"""
+        self._refill()
+        return self.tokens >= self.capacity
+
+class FairScheduler:
+    """도구 호출 가중 공정 큐 (이벤트 루프 스레드 전용)
+
+    클라이언트마다 가상 완료 시각(finish = max(가상 시각, 직전 finish) + 비용/가중치)을
+    붙여 대기시키고, 자리가 나면 클라이언트/도구 동시 실행 한도를 만족하는 요청 중
+    finish가 가장 작은 것부터 실행합니다. 한 클라이언트가 요청을 몰아 보내도
+    다른 클라이언트의 요청이 그 뒤에 줄 서지 않습니다. 대기열이 가득 찼거나
+    바이트 예산을 다 쓴 요청은 큐에 넣지 않고 바로 거절합니다.
+
+    실행/대기 중인 요청이 없고 바이트 예산이 다 찬 클라이언트의 상태는 지우고
+    (요청이 끝날 때, 세션이 닫힐 때, sweep_interval마다), 클라이언트별 통계는
+    최근 max_client_stats개만 유지합니다.
+    """
+    
+    # 도구별 상대 비용 (내용 검색/통계는 한 번에 많은 파일을 읽음)
+    DEFAULT_TOOL_COSTS = {"search_files": 4.0, "file_stats": 4.0, "write_files": 2.0}
+    
+    def __init__(self, capacity: int = 16, client_concurrency: int = 4, client_queue: int = 64,
+                 tool_limits: Dict[str, int] = None, weights: Dict[str, float] = None,
+                 costs: Dict[str, float] = None, client_bytes_per_sec: float = 0,
+                 tool_bytes_per_sec: Dict[str, float] = None, max_client_stats: int = 256,
+                 sweep_interval: float = 30.0):
+        self.capacity = capacity
+        self.client_concurrency = client_concurrency
+        self.client_queue = client_queue
+        self.tool_limits = dict(tool_limits or {})
+        self.weights = dict(weights or {})
+        self.costs = {**self.DEFAULT_TOOL_COSTS, **(costs or {})}
+        self.client_bytes_per_sec = client_bytes_per_sec
+        self.tool_bytes_per_sec = dict(tool_bytes_per_sec or {})
+        self.max_client_stats = max_client_stats
+        self.sweep_interval = sweep_interval
+        
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._queue: List[tuple] = []  # (finish, seq, client, tool, future)
+        self._running = 0
+        self._client_running: Dict[str, int] = {}
+        self._client_waiting: Dict[str, int] = {}
+        self._client_finish: Dict[str, float] = {}
+        self._tool_running: Dict[str, int] = {}
+        self._client_buckets: Dict[str, TokenBucket] = {}
+        self._tool_buckets: Dict[str, TokenBucket] = {}
+        self.counters = {"admitted": 0, "rejected": 0, "completed": 0, "total_wait_ms": 0}
+        self._client_stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._last_sweep = time.monotonic()
+    
+    @classmethod
+    def from_env(cls, executor: "ToolExecutor") -> "FairScheduler":
+        """MCP_SCHEDULER_CAPACITY, MCP_CLIENT_CONCURRENCY, MCP_CLIENT_QUEUE, MCP_CLIENT_WEIGHTS,
+        MCP_TOOL_COSTS, MCP_CLIENT_BYTES_PER_SEC, MCP_TOOL_BYTES_PER_SEC 환경 변수로 생성
+
+        도구별 동시 실행 한도는 워커 풀 설정을 그대로 사용합니다.
+        """
+        return cls(
+            capacity=int(os.environ.get("MCP_SCHEDULER_CAPACITY", "0")) or executor.max_workers,
+            client_concurrency=int(os.environ.get("MCP_CLIENT_CONCURRENCY", "4")),
+            client_queue=int(os.environ.get("MCP_CLIENT_QUEUE", "64")),
+            tool_limits=executor.tool_limits,
+            weights=parse_env_mapping("MCP_CLIENT_WEIGHTS", float),
+            costs=parse_env_mapping("MCP_TOOL_COSTS", float),
+            client_bytes_per_sec=float(os.environ.get("MCP_CLIENT_BYTES_PER_SEC", "0")),
+            tool_bytes_per_sec=parse_env_mapping("MCP_TOOL_BYTES_PER_SEC", float)
+        )
+    
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, rate: float) -> Optional[TokenBucket]:
+        if not rate:
+            return None
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate)
+        return bucket
+    
+    def _eligible(self, client: str, tool: str) -> bool:
+        return (
+            self._running < self.capacity
+            and self._client_running.get(client, 0) < self.client_concurrency
+            and self._tool_running.get(tool, 0) < self.tool_limits.get(tool, self.capacity)
+        )
+    
+    def _check_quota(self, client: str, tool: str):
+        if self._client_waiting.get(client, 0) >= self.client_queue:
+            raise QuotaExceeded(f"클라이언트 대기열이 가득 찼습니다: {client}", 1.0)
+        for bucket, owner in (
+            (self._bucket(self._client_buckets, client, self.client_bytes_per_sec), f"클라이언트 {client}"),
+            (self._bucket(self._tool_buckets, tool, self.tool_bytes_per_sec.get(tool, 0)), f"도구 {tool}")
+        ):
+            if bucket is not None:
+                wait = bucket.retry_after()
+                if wait > 0:
+                    raise QuotaExceeded(f"{owner}의 전송량 한도를 초과했습니다", wait)
+    
+    def _dispatch(self):
+        """자리가 있는 동안 finish가 가장 작은 실행 가능 요청부터 시작"""
+        skipped = []
+        while self._queue and self._running < self.capacity:
+            item = heapq.heappop(self._queue)
+            finish, _, client, tool, future = item
+            if future.done():  # 대기 중 취소됨
+                continue
+            if not self._eligible(client, tool):
+                skipped.append(item)
+                continue
+            self._virtual_time = max(self._virtual_time, finish)
+            self._acquire(client, tool)
+            future.set_result(None)
+        for item in skipped:
+            heapq.heappush(self._queue, item)
+    
+    def _acquire(self, client: str, tool: str):
+        self._running += 1
+        self._client_running[client] = self._client_running.get(client, 0) + 1
+        self._tool_running[tool] = self._tool_running.get(tool, 0) + 1
+    
+    def _release(self, client: str, tool: str):
+        self._running -= 1
+        self._client_running[client] -= 1
+        self._tool_running[tool] -= 1
+        if not self._client_running[client]:
+            del self._client_running[client]
+    
+    def forget(self, client: str):
+        """쉬고 있는 클라이언트의 상태 제거 (예산이 남은 빚이 있으면 유지)
+
+        가상 완료 시각은 대기 요청이 모두 실행되면 가상 시각 이하가 되므로
+        지워도 순서가 바뀌지 않고, 바이트 예산은 다 차 있으면 새로 만든 것과 같습니다.
+        """
+        if client in self._client_running or client in self._client_waiting:
+            return
+        if self._client_finish.get(client, 0.0) > self._virtual_time:
+            return
+        bucket = self._client_buckets.get(client)
+        if bucket is not None and not bucket.full():
+            return
+        self._client_buckets.pop(client, None)
+        self._client_finish.pop(client, None)
+    
+    def _sweep(self):
+        """sweep_interval마다 쉬고 있는 클라이언트 정리 (연결 종료를 못 본 경우 대비)"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        for client in list(self._client_finish.keys() | self._client_buckets.keys()):
+            self.forget(client)
+    
+    def _stats(self, client: str) -> Dict[str, int]:
+        stats = self._client_stats.get(client)
+        if stats is None:
+            stats = self._client_stats[client] = {"admitted": 0, "rejected": 0, "bytes_out": 0}
+            while len(self._client_stats) > self.max_client_stats:
+                self._client_stats.popitem(last=False)
+        else:
+            self._client_stats.move_to_end(client)
+        return stats
+    
+    async def run(self, client: str, tool: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """call()을 공정 순서에 따라 실행 (한도 초과면 QuotaExceeded)"""
+        self._sweep()
+        stats = self._stats(client)
+        try:
+            self._check_quota(client, tool)
+        except QuotaExceeded:
+            self.counters["rejected"] += 1
+            stats["rejected"] += 1
+            raise
+        
+        weight = self.weights.get(client, 1.0)
+        start = max(self._virtual_time, self._client_finish.get(client, 0.0))
+        finish = self._client_finish[client] = start + self.costs.get(tool, 1.0) / weight
+        self.counters["admitted"] += 1
+        stats["admitted"] += 1
+        queued_at = time.monotonic()
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (finish, next(self._seq), client, tool, future))
+        self._client_waiting[client] = self._client_waiting.get(client, 0) + 1
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 자리를 받은 직후 취소되었으면 자리를 돌려줌
+            if future.done() and not future.cancelled():
+                self._release(client, tool)
+                self._dispatch()
+            raise
+        finally:
+            self._client_waiting[client] -= 1
+            if not self._client_waiting[client]:
+                del self._client_waiting[client]
+        self.counters["total_wait_ms"] += int((time.monotonic() - queued_at) * 1000)
+        
+        try:
+            result = await call()
+        finally:
+            self._release(client, tool)
+            self.counters["completed"] += 1
+            self._dispatch()
+        
+        size = sum(len(item.get("text") or item.get("blob") or "") for item in result.get("content", []))
+        stats["bytes_out"] += size
+        for bucket in (self._client_buckets.get(client), self._tool_buckets.get(tool)):
+            if bucket is not None:
+                bucket.charge(size)
+        self.forget(client)
+        return result
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "running": self._running,
+            "queued": sum(self._client_waiting.values()),
+            "client_concurrency": self.client_concurrency,
+            "client_queue": self.client_queue,
+            **self.counters,
+            "tracked_clients": len(self._client_finish.keys() | self._client_buckets.keys()),
+            "clients": {client: dict(stats) for client, stats in self._client_stats.items()}
+        }
+
+class SubscriptionHub:
+    """resources/subscribe 구독 관리와 변경 알림 전달
+
+    메타데이터 캐시의 변경 이벤트(루트당 감시 하나)를 받아 구독한 세션에만
+    알립니다. 이벤트는 debounce 초 동안 모아 세션별로 URI당 한 번씩
+    notifications/resources/updated를 보냅니다. 디렉토리 URI를 구독하면
+    바로 아래 항목의 변경도 함께 알립니다.
+    """
+    
+    def __init__(self, debounce: float = 0.2):
+        self.debounce = debounce
+        self._subscribers: Dict[str, set] = {}  # 경로 -> 세션 집합
+        self._pending: Dict[Any, set] = {}      # 세션 -> 알릴 URI 집합
+        self._sending: Dict[Any, set] = {}      # 세션 -> 전송 중인 알림 태스크
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_handle = None
+        self.counters = {"events": 0, "notifications": 0}
+    
+    def subscribe(self, session: "ClientSession", path: str) -> str:
+        self._loop = asyncio.get_running_loop()
+        path = os.path.abspath(path)
+        self._subscribers.setdefault(path, set()).add(session)
+        session.subscriptions.add(path)
+        return path
+    
+    def unsubscribe(self, session: "ClientSession", path: str):
+        path = os.path.abspath(path)
+        sessions = self._subscribers.get(path)
+        if sessions is not None:
+            sessions.discard(session)
+            if not sessions:
+                del self._subscribers[path]
+        session.subscriptions.discard(path)
+    
+    def drop_session(self, session: "ClientSession"):
+        """연결이 끝난 세션의 구독과 대기/전송 중인 알림 제거"""
+        for path in list(session.subscriptions):
+            self.unsubscribe(session, path)
+        self._pending.pop(session, None)
+        for task in self._sending.pop(session, ()):
+            task.cancel()
+    
+    def on_change(self, path: str, kind: str = None):
+        """메타데이터 캐시 리스너 (감시 스레드에서 호출)"""
+        if not self._subscribers or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._queue, path)
+        except RuntimeError:
+            pass  # 이벤트 루프 종료
+    
+    def _queue(self, path: str):
+        self.counters["events"] += 1
+        for target in (path, os.path.dirname(path)):
+            for session in self._subscribers.get(target, ()):
+                self._pending.setdefault(session, set()).add(target)
+        if self._pending and self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.debounce, self._flush)
+    
+    def _flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        for session, paths in pending.items():
+            # 루프는 태스크를 약하게만 참조하므로 끝날 때까지 직접 보관
+            task = asyncio.create_task(self._notify(session, sorted(paths)))
+            tasks = self._sending.setdefault(session, set())
+            tasks.add(task)
+            task.add_done_callback(functools.partial(self._sent, session))
+    
+    def _sent(self, session: "ClientSession", task: asyncio.Task):
+        tasks = self._sending.get(session)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._sending[session]
+    
+    async def _notify(self, session: "ClientSession", paths: List[str]):
+        for path in paths:
+            try:
+                await session.notify({
+                    "jsonrpc": "2.0",
+                    "method": "notifications/resources/updated",
+                    "params": {"uri": f"file://{path}"}
+                })
+                self.counters["notifications"] += 1
+            except Exception as e:
+                logger.error(f"변경 알림 전송 오류: {e}")
+                return
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "subscribed_paths": len(self._subscribers),
+            "pending_sessions": len(self._pending),
+            "sending": sum(len(tasks) for tasks in self._sending.values()),
+            "debounce_seconds": self.debounce,
+            **self.counters
+        }
+
 class FileSystemMCPServer:
     """파일 시스템 MCP 서버"""
     
-    def __init__(self, project_root: str = None):
+    def __init__(self, project_root: str = None, executor: ToolExecutor = None):
         self.server = MCPServer("filesystem-server")
         self.project_root = project_root or os.getcwd()
-        self.server.add_root(self.project_root)
+        
+        # 블로킹 작업을 이벤트 루프 밖에서 실행할 워커 풀
+        self.executor = executor or ToolExecutor.from_env()
         
         # 허용된 파일 확장자 (보안상 제한)
         self.allowed_extensions = {
@@ -66,19 +2205,153 @@ class FileSystemMCPServer:
             '.git', '.svn', '__pycache__', 'node_modules', '.venv', 
             'venv', '.pytest_cache', '.mypy_cache', 'dist', 'build'
         }
-    
-    def is_path_allowed(self, path: str) -> bool:
-        """경로가 허용되는지 확인"""
-        abs_path = os.path.abspath(path)
         
-        # 루트 디렉토리 내부인지 확인
-        for root in self.server.roots:
-            if abs_path.startswith(root):
-                return True
-        return False
+        # 한 번의 읽기 응답에 담을 최대 바이트 (이보다 크면 커서로 나눠 읽음)
+        self.max_read_bytes = int(os.environ.get("MCP_MAX_READ_BYTES", str(1024 * 1024)))
+        self.stream_chunk_bytes = 64 * 1024
+        
+        # 목록 응답 한 페이지의 최대 항목 수 (나머지는 커서로 이어서 조회)
+        self.resources_page_size = max(1, int(os.environ.get("MCP_RESOURCES_PAGE_SIZE", "50")))
+        self.list_page_size = max(1, int(os.environ.get("MCP_LIST_PAGE_SIZE", "500")))
+        
+        # 루트별 내용 검색 색인 (처음 내용 검색 시 생성)
+        self.content_indexes: Dict[str, ContentIndex] = {}
+        self._index_lock = threading.Lock()
+        
+        # 변경 이벤트로 다시 색인할 파일 (쓰는 중 연속 이벤트는 index_debounce 초 동안 모아 한 번만 색인)
+        self.index_debounce = float(os.environ.get("MCP_INDEX_DEBOUNCE_SECONDS", "0.5"))
+        self._dirty_paths: set = set()
+        self._dirty_lock = threading.Lock()
+        self._index_timer: Optional[threading.Timer] = None
+        
+        # 파일 분류(바이너리/인코딩/MIME) 캐시
+        self.file_types = FileTypeCache()
+        
+        # 메타데이터 캐시 밖 디렉토리 목록 캐시 (list_directory 페이지 처리용)
+        self.dir_listings = DirectoryListingCache()
+        
+        # 조건부 읽기(if_none_match)용 내용 해시 캐시
+        self.content_hashes = ContentHashCache(
+            max_hash_bytes=int(os.environ.get("MCP_HASH_MAX_BYTES", str(256 * 1024 * 1024)))
+        )
+        
+        # file_stats / resources/list 결과 캐시
+        self.result_cache = ResultCache(
+            max_entries=int(os.environ.get("MCP_RESULT_CACHE_ENTRIES", "256")),
+            max_bytes=int(os.environ.get("MCP_RESULT_CACHE_BYTES", str(32 * 1024 * 1024)))
+        )
+        
+        # 메서드/도구별 지연 시간과 처리량 지표
+        self.metrics = ServerMetrics()
+        
+        # 클라이언트 간 도구 호출 공정 스케줄러
+        self.scheduler = FairScheduler.from_env(self.executor)
+        
+        # resources/subscribe 구독 (메타데이터 캐시의 변경 감시를 공유)
+        self.subscriptions = SubscriptionHub(
+            debounce=float(os.environ.get("MCP_NOTIFY_DEBOUNCE_SECONDS", "0.2"))
+        )
+        
+        # 루트별 메타데이터 캐시 (변경 감시로 최신 상태 유지)
+        self.metadata_cache: Optional[MetadataCache] = None
+        if os.environ.get("MCP_METADATA_CACHE", "1") != "0":
+            self.metadata_cache = MetadataCache(
+                self.excluded_dirs,
+                poll_interval=float(os.environ.get("MCP_WATCH_POLL_SECONDS", "2.0"))
+            )
+            self.metadata_cache.listeners.append(self._on_file_changed)
+            self.metadata_cache.listeners.append(self.result_cache.invalidate_path)
+            self.metadata_cache.listeners.append(self.server.root_matcher.invalidate)
+            self.metadata_cache.listeners.append(self.subscriptions.on_change)
+            self.metadata_cache.listeners.append(self.content_hashes.invalidate)
+            self.metadata_cache.listeners.append(self.file_types.invalidate)
+            self.metadata_cache.listeners.append(self.dir_listings.invalidate)
+            self.server.root_listeners.append(self.metadata_cache.add_root)
+        
+        # 도구 이름 -> (처리기, 워커 풀에서 실행할지 여부)
+        self.tool_handlers: Dict[str, Tuple[Callable[[Dict[str, Any]], Dict[str, Any]], bool]] = {
+            "search_files": (self._search_files, True),
+            "read_file": (self._read_file, True),
+            "write_file": (self._write_file, True),
+            "write_files": (self._write_files, True),
+            "list_directory": (self._list_directory, True),
+            "file_stats": (self._file_stats, True),
+            "server_stats": (self._server_stats, False)
+        }
+        
+        # 요청마다 같은 고정 응답은 한 번만 직렬화
+        self.tools_list_result = PreSerialized({"tools": self.get_tools()})
+        self._initialize_results: Dict[str, PreSerialized] = {}
+        
+        # 변경 감시가 꺼져 있으면 구독을 광고하지 않음
+        self.server.capabilities["resources"]["subscribe"] = self.metadata_cache is not None
+        
+        self.server.add_root(self.project_root)
+    
+    def initialize_result(self, encoding: str) -> "PreSerialized":
+        """initialize 결과 (협상된 인코딩별로 한 번만 만들어 재사용)"""
+        result = self._initialize_results.get(encoding)
+        if result is None:
+            capabilities = dict(self.server.capabilities)
+            capabilities["experimental"] = {
+                "resultEncoding": {"supported": RESULT_ENCODINGS, "selected": encoding}
+            }
+            result = self._initialize_results[encoding] = PreSerialized({
+                "protocolVersion": "2024-11-05",
+                "capabilities": capabilities,
+                "serverInfo": {
+                    "name": self.server.name,
+                    "version": self.server.version
+                }
+            })
+        return result
+    
+    def is_path_allowed(self, path: str, resolve_leaf: bool = False) -> bool:
+        """경로가 허용되는지 확인 (단일 경로 도구는 resolve_leaf=True로 링크까지 해석)"""
+        return self.server.root_matcher.allows(path, resolve_leaf)
+    
+    def _cache_ready(self, path: str) -> bool:
+        """경로를 메타데이터 캐시로 조회할 수 있는지 여부 (MetadataCache.is_ready)"""
+        return self.metadata_cache is not None and self.metadata_cache.is_ready(path)
+    
+    def _walk(self, top: str):
+        """캐시가 준비되었으면 캐시를, 아니면 실제 파일 시스템을 순회"""
+        if self._cache_ready(top):
+            return self.metadata_cache.walk(top)
+        return os.walk(top)
+    
+    def _on_file_changed(self, path: str, kind: str):
+        """메타데이터 캐시 변경 이벤트를 모아 두었다가 내용 색인에 반영 (감시 스레드에서 호출)"""
+        if not self.content_indexes or os.path.splitext(path)[1].lower() not in self.allowed_extensions:
+            return
+        with self._dirty_lock:
+            self._dirty_paths.add(path)
+            if self._index_timer is None:
+                self._index_timer = threading.Timer(self.index_debounce, self._flush_dirty_paths)
+                self._index_timer.daemon = True
+                self._index_timer.start()
+    
+    def _flush_dirty_paths(self):
+        """모아 둔 변경 파일을 경로당 한 번씩 다시 색인"""
+        with self._dirty_lock:
+            paths, self._dirty_paths = self._dirty_paths, set()
+            if self._index_timer is not None and self._index_timer is not threading.current_thread():
+                self._index_timer.cancel()
+            self._index_timer = None
+        for root, index in list(self.content_indexes.items()):
+            prefix = root.rstrip(os.sep) + os.sep
+            for path in paths:
+                if path.startswith(prefix):
+                    index.update_path(path)
     
     def get_file_info(self, file_path: str) -> Dict[str, Any]:
         """파일 정보 반환"""
+        if self.metadata_cache is not None:
+            cached = self.metadata_cache.get(file_path)
+            if cached is not None:
+                record_request(cache_hits=1)
+                return dict(cached)
+        record_request(files_touched=1)
         try:
             stat = os.stat(file_path)
             return {
@@ -86,86 +2359,349 @@ class FileSystemMCPServer:
                 "path": file_path,
                 "size": stat.st_size,
                 "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "is_directory": os.path.isdir(file_path),
-                "mime_type": mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+                "is_directory": S_ISDIR(stat.st_mode),
+                "mime_type": guess_mime_type(file_path)
             }
         except Exception as e:
             logger.error(f"파일 정보 조회 오류: {e}")
             return {}
     
-    async def list_resources(self) -> Dict[str, Any]:
-        """MCP Resources 목록 반환"""
+    async def list_resources(self, cursor: str = None) -> Dict[str, Any]:
+        """MCP Resources 목록 반환 (페이지 단위, 다음 페이지는 nextCursor로 요청)"""
+        return await self.executor.run("resources/list", self._list_resources, cursor)
+    
+    def _is_watched(self, path: str) -> bool:
+        """경로의 변경을 이벤트로 즉시 받는지 여부 (MetadataCache.is_watching)"""
+        return self.metadata_cache is not None and self.metadata_cache.is_watching(path)
+    
+    # 우선순위가 높은 파일들 (루트 바로 아래에 있으면 목록 앞쪽에 노출)
+    PRIORITY_FILES = [
+        'README.md', 'README.txt', 'requirements.txt', 'package.json',
+        'setup.py', 'Dockerfile', 'docker-compose.yml', '.env.example',
+        'config.py', 'settings.py', 'main.py', 'app.py', 'index.js'
+    ]
+    
+    def _list_resources(self, cursor: str = None) -> Dict[str, Any]:
+        """리소스 목록 한 페이지 (커서는 마지막으로 반환한 리소스의 위치)"""
+        position = decode_cursor(cursor) if cursor else {}
+        if position and position.get("k") not in ("h", "p", "w"):
+            raise ValueError("유효하지 않은 커서입니다")
+        
+        cache_key = ResultCache.make_key("resources/list", {"cursor": cursor, "limit": self.resources_page_size})
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         resources = []
+        visited_dirs: List[str] = []
+        next_cursor = None
         
-        for root in self.server.roots:
-            # 루트 디렉토리 자체를 리소스로 추가
-            resources.append({
-                "uri": f"file://{root}",
-                "name": f"프로젝트 루트 ({os.path.basename(root)})",
-                "mimeType": "application/vnd.directory",
-                "description": f"프로젝트 루트 디렉토리: {root}"
-            })
+        for state, resource in self._iter_resources(position, visited_dirs):
+            if len(resources) >= self.resources_page_size:
+                next_cursor = encode_cursor(last_state)
+                break
+            resources.append(resource)
+            last_state = state
+        
+        result = {"resources": resources}
+        if next_cursor:
+            result["nextCursor"] = next_cursor
+        validator = None
+        if visited_dirs:
+            validator = dir_mtime_validator(self._dir_mtimes(visited_dirs))
+        self.result_cache.put(
+            cache_key, result, list(self.server.roots),
+            size=sum(len(r["uri"]) + len(r["description"]) for r in resources),
+            validator=validator
+        )
+        return result
+    
+    def _iter_resources(self, position: Dict[str, Any],
+                        visited_dirs: List[str]) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(위치, 리소스)를 안정된 순서로 생성: 루트 → 우선순위 파일 → 이름순 깊이 우선 파일
+
+        position 다음 항목부터 시작하므로 페이지 사이에 파일이 추가/삭제되어도
+        이미 반환한 항목을 다시 세거나 건너뛰지 않습니다.
+        """
+        start_root = position.get("r", 0)
+        for index, root in enumerate(list(self.server.roots)):
+            if index < start_root:
+                continue
+            resume = position if index == start_root else {}
+            kind = resume.get("k")
+            
+            if kind is None:
+                # 루트 디렉토리 자체를 리소스로 추가
+                yield {"r": index, "k": "h"}, {
+                    "uri": f"file://{root}",
+                    "name": f"프로젝트 루트 ({os.path.basename(root)})",
+                    "mimeType": "application/vnd.directory",
+                    "description": f"프로젝트 루트 디렉토리: {root}"
+                }
+            
+            # 루트 레벨의 우선순위 파일들 먼저 추가
+            if kind in (None, "h", "p"):
+                cache_ready = self._cache_ready(root)
+                for number, filename in enumerate(self.PRIORITY_FILES):
+                    if kind == "p" and number <= resume.get("n", -1):
+                        continue
+                    file_path = os.path.join(root, filename)
+                    info = self.metadata_cache.get(file_path) if cache_ready else None
+                    if (not info["is_directory"]) if info else os.path.isfile(file_path):
+                        yield {"r": index, "k": "p", "n": number}, self._file_resource(root, file_path)
             
-            # 주요 파일들을 리소스로 추가
-            for file_path in self._scan_important_files(root):
+            # 나머지 파일들 (감시되지 않는 루트는 방문 디렉토리를 캐시 검증용으로 기록)
+            after = resume.get("a", "").split("/") if kind == "w" else ()
+            record = None if self._is_watched(root) else visited_dirs
+            priority = set(self.PRIORITY_FILES)
+            for file_path in iter_sorted_files(root, lambda d: self._sorted_entries(d, record), after):
                 rel_path = os.path.relpath(file_path, root)
-                file_info = self.get_file_info(file_path)
-                
-                if file_info:
-                    resources.append({
-                        "uri": f"file://{file_path}",
-                        "name": rel_path,
-                        "mimeType": file_info["mime_type"],
-                        "description": f"파일 크기: {file_info['size']} bytes"
-                    })
-        
+                if rel_path in priority:
+                    continue
+                if os.path.splitext(file_path)[1].lower() not in self.allowed_extensions:
+                    continue
+                yield {"r": index, "k": "w", "a": rel_path.replace(os.sep, "/")}, self._file_resource(root, file_path)
+    
+    def _file_resource(self, root: str, file_path: str) -> Dict[str, Any]:
+        file_info = self.get_file_info(file_path)
         return {
-            "resources": resources
+            "uri": f"file://{file_path}",
+            "name": os.path.relpath(file_path, root),
+            "mimeType": file_info.get("mime_type", "application/octet-stream"),
+            "description": f"파일 크기: {file_info.get('size', 0)} bytes"
         }
     
-    def _scan_important_files(self, root_dir: str, max_files: int = 50) -> List[str]:
-        """중요한 파일들 스캔"""
-        important_files = []
+    def _sorted_entries(self, directory: str, visited_dirs: List[str] = None) -> List[Tuple[str, bool]]:
+        """디렉토리의 (이름, 디렉토리 여부) 이름순 목록 (제외 디렉토리 생략)"""
+        if visited_dirs is not None:
+            visited_dirs.append(directory)
+        names = self.metadata_cache.list_dir(directory) if self._cache_ready(directory) else None
+        if names is not None:
+            entries = []
+            for name in names:
+                info = self.metadata_cache.get(os.path.join(directory, name))
+                entries.append((name, bool(info and info["is_directory"])))
+        else:
+            try:
+                entries = self.dir_listings.entries(directory)
+            except OSError:
+                return []
+        return [(name, is_dir) for name, is_dir in entries if not (is_dir and name in self.excluded_dirs)]
+    
+    @staticmethod
+    def _dir_mtimes(dirs: Iterable[str]) -> Dict[str, int]:
+        mtimes = {}
+        for path in dirs:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+    
+    def _iter_indexable_files(self, root_dir: str) -> Iterable[str]:
+        """내용 색인 대상 파일 (제외 디렉토리/허용 확장자 적용)"""
+        for root, dirs, files in self._walk(root_dir):
+            dirs[:] = [d for d in dirs if d not in self.excluded_dirs]
+            for file in files:
+                if os.path.splitext(file)[1].lower() in self.allowed_extensions:
+                    yield os.path.join(root, file)
+    
+    def _get_content_index(self, root: str) -> ContentIndex:
+        """루트의 내용 색인을 최신 상태로 반환"""
+        with self._index_lock:
+            index = self.content_indexes.get(root)
+            if index is None:
+                index = ContentIndex(root)
+                index.refresh(self._iter_indexable_files(root), force=True)
+                self.content_indexes[root] = index
+                return index
         
-        # 우선순위가 높은 파일들
-        priority_files = [
-            'README.md', 'README.txt', 'requirements.txt', 'package.json',
-            'setup.py', 'Dockerfile', 'docker-compose.yml', '.env.example',
-            'config.py', 'settings.py', 'main.py', 'app.py', 'index.js'
-        ]
+        if not self._is_watched(root):
+            # 감시 중인 루트는 변경 이벤트로 색인이 갱신되므로 재검사 불필요
+            index.refresh(self._iter_indexable_files(root))
+        else:
+            # 아직 모아 두기만 한 변경분은 검색 전에 반영
+            self._flush_dirty_paths()
+        return index
+    
+    @staticmethod
+    def _code_unit(encoding: Optional[str]) -> int:
+        """범위 경계를 맞출 단위 (UTF-8 문자 경계 1, UTF-16/32 코드 단위, 그 외 0)"""
+        if encoding == "utf-8":
+            return 1
+        if encoding and encoding.startswith(("utf-16", "utf-32")):
+            return int(encoding[4:6]) // 8
+        return 0
+    
+    def _read_range(self, reader: FileRangeReader, options: Dict[str, Any],
+                    encoding: Optional[str] = "utf-8") -> Tuple[str, Dict[str, Any]]:
+        """offset/length, start_line/end_line, cursor 옵션에 따라 파일 일부 읽기
+
+        encoding으로 디코딩하며, None(바이너리)이면 base64 문자열을 반환합니다.
+        """
+        mtime_ns = reader.stat.st_mtime_ns
+        length = min(int(options.get("length") or self.max_read_bytes), self.max_read_bytes)
+        unit = self._code_unit(encoding)
+        
+        if options.get("cursor"):
+            state = decode_cursor(options["cursor"])
+            if state.get("m") != mtime_ns:
+                raise ValueError("파일이 변경되어 커서가 더 이상 유효하지 않습니다")
+            offset, line, end_line = state.get("o", 0), state.get("l"), state.get("e")
+        elif options.get("start_line") or options.get("end_line"):
+            line = int(options.get("start_line") or 1)
+            end_line = options.get("end_line")
+            offset = reader.line_offset(line)
+        else:
+            offset, line, end_line = int(options.get("offset") or 0), None, None
         
-        # 루트 레벨의 우선순위 파일들 먼저 추가
-        for filename in priority_files:
-            file_path = os.path.join(root_dir, filename)
-            if os.path.isfile(file_path):
-                important_files.append(file_path)
+        if line is not None and (encoding is None or unit > 1):
+            raise ValueError("줄 단위 읽기는 바이너리나 UTF-16/32 파일을 지원하지 않습니다")
+        
+        if line is not None:
+            data, next_offset, next_line = reader.read_lines(offset, line, end_line, length)
+            eof = next_offset >= reader.size or (end_line is not None and next_line > end_line)
+            next_state = {"o": next_offset, "l": next_line, "e": end_line, "m": mtime_ns}
+        else:
+            data, next_offset = reader.read_bytes(offset, length, unit)
+            offset = next_offset - len(data)
+            if encoding is not None and unit == 0 and next_offset < reader.size:
+                # cp949 등 가변 길이 인코딩은 끝에 걸친 불완전한 문자를 다음 범위로 넘김
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+                decoder.decode(data)
+                pending = decoder.getstate()[0]
+                if pending and len(pending) < len(data):
+                    data, next_offset = data[:-len(pending)], next_offset - len(pending)
+            eof = next_offset >= reader.size
+            next_state = {"o": next_offset, "m": mtime_ns}
+        
+        range_info = {
+            "offset": offset,
+            "length": next_offset - offset,
+            "total_size": reader.size,
+            "eof": eof,
+            "next_cursor": None if eof else encode_cursor(next_state)
+        }
+        if line is not None:
+            range_info["start_line"] = line
+            range_info["end_line"] = next_line - 1
         
-        # 나머지 파일들 추가 (제한된 수량)
+        if encoding is None:
+            return base64.b64encode(data).decode("ascii"), range_info
+        text = data.decode(encoding, errors="replace")
+        if offset == 0 and text.startswith("\ufeff"):
+            text = text[1:]
+        return text, range_info
+    
+    def _read_file_range(self, file_path: str, options: Dict[str, Any],
+                         binary_ok: bool = False) -> Tuple[Optional[str], Dict[str, Any]]:
+        """범위 읽기 결과와 ETag (if_none_match가 현재 ETag와 같으면 내용 없이 반환)
+
+        내용 해시는 파일 전체를 읽는 경우, 한 번에 읽을 수 있는 작은 파일, 또는
+        if_none_match로 내용 해시를 비교할 때만 계산합니다. 큰 파일의 범위 읽기는
+        약한 ETag를 써서 커지는 로그 파일도 페이지 단위로 싸게 읽을 수 있습니다.
+        바이너리 파일은 binary_ok일 때만 base64로 반환하고, 아니면 디코딩하지 않고 거부합니다.
+        """
+        with FileRangeReader(file_path) as reader:
+            file_type = self.file_types.classify(file_path, reader)
+            if_none_match = options.get("if_none_match")
+            if if_none_match:
+                strong = not if_none_match.startswith("W/")
+                etag = self.content_hashes.etag(file_path, reader, strong)
+                if if_none_match == etag:
+                    return None, {"etag": etag, "not_modified": True, "total_size": reader.size,
+                                  "mime_type": file_type["mime_type"]}
+            if file_type["binary"] and not binary_ok:
+                raise ValueError("바이너리 파일은 텍스트로 읽을 수 없습니다")
+            content, range_info = self._read_range(reader, options, file_type["encoding"])
+            whole_file = range_info["offset"] == 0 and range_info["eof"] and "start_line" not in range_info
+            etag = self.content_hashes.etag(
+                file_path, reader, strong=whole_file or reader.size <= self.max_read_bytes
+            )
+            range_info.update(etag=etag, encoding=file_type["encoding"], mime_type=file_type["mime_type"])
+            return content, range_info
+    
+    def _list_entries(self, dir_path: str) -> List[Dict[str, Any]]:
+        """디렉토리 항목 정보 목록 (제외 디렉토리 생략)"""
+        names = self.metadata_cache.list_dir(dir_path) if self._cache_ready(dir_path) else None
+        return [
+            self.get_file_info(os.path.join(dir_path, item))
+            for item in (names if names is not None else os.listdir(dir_path))
+            if item not in self.excluded_dirs
+        ]
+    
+    def _open_stream(self, file_path: str) -> Tuple[FileRangeReader, Dict[str, Any], Any]:
+        """스트리밍할 파일 열기와 분류 (리더, 파일 종류, 증분 디코더)"""
+        reader = FileRangeReader(file_path)
         try:
-            for root, dirs, files in os.walk(root_dir):
-                # 제외 디렉토리 스킵
-                dirs[:] = [d for d in dirs if d not in self.excluded_dirs]
-                
-                for file in files:
-                    if len(important_files) >= max_files:
-                        break
-                        
-                    file_path = os.path.join(root, file)
-                    ext = os.path.splitext(file)[1].lower()
-                    
-                    if ext in self.allowed_extensions and file_path not in important_files:
-                        important_files.append(file_path)
-                
-                if len(important_files) >= max_files:
-                    break
-                    
-        except Exception as e:
-            logger.error(f"파일 스캔 오류: {e}")
+            file_type = self.file_types.classify(file_path, reader)
+            if file_type["binary"]:
+                raise ValueError("바이너리 파일은 스트리밍할 수 없습니다")
+        except BaseException:
+            reader.close()
+            raise
+        # 청크 경계에 걸친 멀티바이트 문자는 증분 디코더가 다음 청크와 이어 붙임
+        decoder = codecs.getincrementaldecoder(file_type["encoding"])(errors="replace")
+        return reader, file_type, decoder
+    
+    def _read_stream_chunk(self, reader: FileRangeReader, decoder: Any, offset: int) -> Tuple[str, int]:
+        """offset부터 한 청크를 읽어 디코딩 (텍스트, 다음 위치)"""
+        data, end = reader.read_bytes(offset, self.stream_chunk_bytes)
+        text = decoder.decode(data, final=end >= reader.size)
+        if offset == 0 and text.startswith("\ufeff"):
+            text = text[1:]
+        return text, end
+    
+    async def stream_resource(self, uri: str, file_path: str,
+                              notify: Callable[[Dict[str, Any]], Awaitable[None]]) -> Dict[str, Any]:
+        """파일을 청크 단위 알림으로 전송하고 요약 결과 반환
+
+        파일 열기/분류와 청크 읽기/디코딩은 워커 스레드에서 하고, 이벤트 루프는
+        알림 전송만 합니다.
+        """
+        chunks = 0
+        reader, file_type, decoder = await self.executor.run("resources/read", self._open_stream, file_path)
+        try:
+            offset = 0
+            while offset < reader.size:
+                text, end = await self.executor.run(
+                    "resources/read", self._read_stream_chunk, reader, decoder, offset
+                )
+                await notify({
+                    "jsonrpc": "2.0",
+                    "method": "notifications/resources/chunk",
+                    "params": {
+                        "uri": uri,
+                        "offset": offset,
+                        "totalSize": reader.size,
+                        "text": text
+                    }
+                })
+                offset = end
+                chunks += 1
+            total_size = reader.size
+        finally:
+            reader.close()
         
-        return important_files
+        return {
+            "contents": [{
+                "uri": uri,
+                "mimeType": file_type["mime_type"],
+                "text": "",
+                "totalSize": total_size,
+                "streamed": True,
+                "chunks": chunks
+            }]
+        }
     
-    async def read_resource(self, uri: str) -> Dict[str, Any]:
-        """리소스 읽기"""
+    async def read_resource(self, uri: str, options: Dict[str, Any] = None,
+                            notify: Callable[[Dict[str, Any]], Awaitable[None]] = None) -> Dict[str, Any]:
+        """리소스 읽기
+
+        options에 offset/length, start_line/end_line, cursor를 주면 일부만 읽고,
+        stream=True와 notify 콜백을 주면 청크 알림으로 전송합니다.
+        """
+        options = options or {}
         try:
             # URI에서 파일 경로 추출
             if not uri.startswith("file://"):
@@ -173,43 +2709,57 @@ class FileSystemMCPServer:
             
             file_path = uri[7:]  # "file://" 제거
             
-            if not self.is_path_allowed(file_path):
+            if not self.is_path_allowed(file_path, resolve_leaf=True):
                 raise PermissionError("접근 권한이 없습니다")
             
             if os.path.isdir(file_path):
                 # 디렉토리인 경우 목록 반환
-                contents = []
                 try:
-                    for item in os.listdir(file_path):
-                        item_path = os.path.join(file_path, item)
-                        if item not in self.excluded_dirs:
-                            contents.append(self.get_file_info(item_path))
+                    contents = await self.executor.run("resources/read", self._list_entries, file_path)
                 except PermissionError:
-                    contents = [{"error": "디렉토리 읽기 권한이 없습니다"}]
+                    return {
+                        "contents": [dict(uri=uri, **encode_result_data([{"error": "디렉토리 읽기 권한이 없습니다"}]))],
+                        "isError": True
+                    }
                 
-                return {
-                    "contents": [{
-                        "uri": uri,
-                        "mimeType": "application/json",
-                        "text": json.dumps(contents, indent=2, ensure_ascii=False)
-                    }]
-                }
+                return {"contents": [dict(uri=uri, **encode_result_data(contents))]}
             
             else:
                 # 파일인 경우 내용 읽기
                 if os.path.splitext(file_path)[1].lower() not in self.allowed_extensions:
                     raise ValueError("허용되지 않는 파일 형식입니다")
                 
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                if options.get("stream") and notify is not None:
+                    return await self.stream_resource(uri, file_path, notify)
+                
+                content, range_info = await self.executor.run(
+                    "resources/read", self._read_file_range, file_path, options, True
+                )
                 
-                mime_type = mimetypes.guess_type(file_path)[0] or "text/plain"
+                mime_type = range_info["mime_type"]
+                
+                if content is None:
+                    return {
+                        "contents": [{
+                            "uri": uri,
+                            "mimeType": mime_type,
+                            "text": "",
+                            "totalSize": range_info["total_size"],
+                            "etag": range_info["etag"],
+                            "notModified": True
+                        }]
+                    }
                 
+                # 바이너리 파일은 MCP blob(base64)으로 반환
+                body_key = "text" if range_info["encoding"] else "blob"
                 return {
                     "contents": [{
                         "uri": uri,
                         "mimeType": mime_type,
-                        "text": content
+                        body_key: content,
+                        "totalSize": range_info["total_size"],
+                        "nextCursor": range_info["next_cursor"],
+                        "etag": range_info["etag"]
                     }]
                 }
                 
@@ -220,138 +2770,223 @@ class FileSystemMCPServer:
                     "uri": uri,
                     "mimeType": "text/plain",
                     "text": f"오류: {str(e)}"
-                }]
+                }],
+                "isError": True
             }
     
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """도구 호출"""
+        """도구 호출 (핸들러는 워커 풀에서 실행)"""
+        entry = self.tool_handlers.get(name)
+        if entry is None:
+            return {
+                "content": [{
+                    "type": "text",
+                    "text": f"알 수 없는 도구: {name}"
+                }],
+                "isError": True
+            }
+        
+        handler, blocking = entry
         try:
-            if name == "search_files":
-                return await self._search_files(arguments)
-            elif name == "read_file":
-                return await self._read_file(arguments)
-            elif name == "write_file":
-                return await self._write_file(arguments)
-            elif name == "list_directory":
-                return await self._list_directory(arguments)
-            elif name == "file_stats":
-                return await self._file_stats(arguments)
-            else:
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": f"알 수 없는 도구: {name}"
-                    }]
-                }
+            if blocking:
+                return await self.executor.run(name, handler, arguments)
+            return handler(arguments)
         except Exception as e:
             logger.error(f"도구 호출 오류: {e}")
             return {
                 "content": [{
                     "type": "text", 
                     "text": f"오류: {str(e)}"
-                }]
+                }],
+                "isError": True
             }
     
-    async def _search_files(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """파일 검색"""
+    def _iter_filename_matches(self, root: str, name_pattern: str) -> Iterator[str]:
+        """파일명 패턴과 일치하는 허용 확장자 파일 (캐시가 준비되었으면 캐시에서)"""
+        if not self._cache_ready(root):
+            yield from iter_matching_files(root, name_pattern, self.excluded_dirs, self.allowed_extensions)
+            return
+        
+        match = re.compile(fnmatch.translate(name_pattern)).match
+        for dirpath, dirs, files in self.metadata_cache.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if (not name.startswith(".") and match(name)
+                        and os.path.splitext(name)[1].lower() in self.allowed_extensions):
+                    yield os.path.join(dirpath, name)
+    
+    def _content_candidates(self, root: str, mode: str, patterns: List[str]) -> List[str]:
+        """내용 색인으로 좁힌 검색 후보 (정규식은 색인을 쓸 수 없어 전체 파일)"""
+        index = self._get_content_index(root)
+        if mode == "regex":
+            return index.candidates("")
+        candidates = set()
+        for literal in patterns:
+            candidates.update(index.candidates(literal))
+        return sorted(candidates)
+    
+    def _search_files(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """파일 검색
+
+        mode가 "substring"(기본)이면 pattern을, "multi"면 patterns 목록의 리터럴 중
+        하나를, "regex"면 pattern 정규식을 파일 내용에서 찾습니다. 파일명 검색은
+        substring 모드에서 pattern이 있을 때만 합니다.
+        """
         pattern = arguments.get("pattern", "")
         search_in_content = arguments.get("search_in_content", False)
         max_results = arguments.get("max_results", 20)
+        mode = arguments.get("mode", "substring")
+        patterns = arguments.get("patterns") or [pattern]
+        max_matches = arguments.get("max_matches_per_file", 5)
         
         results = []
+        regex = None
+        if search_in_content:
+            regex = build_content_regex(mode, patterns, arguments.get("case_sensitive", False))
         
         for root in self.server.roots:
             try:
-                # 파일명 기반 검색
-                for file_path in glob.glob(os.path.join(root, "**", f"*{pattern}*"), recursive=True):
+                # 파일명 기반 검색 (substring 모드만, 필요한 결과 수만큼만 지연 순회)
+                filename_matches = (
+                    self._iter_filename_matches(root, f"*{pattern}*")
+                    if mode == "substring" and pattern else ()
+                )
+                for file_path in filename_matches:
                     if len(results) >= max_results:
                         break
                     
-                    if self.is_path_allowed(file_path) and os.path.isfile(file_path):
-                        ext = os.path.splitext(file_path)[1].lower()
-                        if ext in self.allowed_extensions:
+                    if self.is_path_allowed(file_path):
+                        results.append({
+                            "path": file_path,
+                            "match_type": "filename",
+                            "info": self.get_file_info(file_path)
+                        })
+                
+                # 내용 기반 검색 (색인으로 후보를 좁힌 뒤 청크 단위로 줄 검사)
+                if search_in_content and len(results) < max_results:
+                    candidates = self._content_candidates(root, mode, patterns)
+                    record_request(files_touched=len(candidates))
+                    batches = self.executor.map_batches(
+                        grep_files, candidates, regex.pattern, regex.flags, max_matches
+                    )
+                    for matched in batches:
+                        allowed = [item for item in matched if self.is_path_allowed(item[0])]
+                        for file_path, matches in allowed[:max_results - len(results)]:
                             results.append({
                                 "path": file_path,
-                                "match_type": "filename",
-                                "info": self.get_file_info(file_path)
+                                "match_type": "content",
+                                "info": self.get_file_info(file_path),
+                                "matches": matches
                             })
-                
-                # 내용 기반 검색
-                if search_in_content and len(results) < max_results:
-                    for file_path in self._scan_important_files(root):
                         if len(results) >= max_results:
                             break
-                        
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                                if pattern.lower() in content.lower():
-                                    results.append({
-                                        "path": file_path,
-                                        "match_type": "content",
-                                        "info": self.get_file_info(file_path)
-                                    })
-                        except Exception:
-                            continue
                             
             except Exception as e:
                 logger.error(f"검색 오류: {e}")
         
-        return {
-            "content": [{
-                "type": "text",
-                "text": json.dumps({
-                    "pattern": pattern,
-                    "results_count": len(results),
-                    "results": results
-                }, indent=2, ensure_ascii=False)
-            }]
-        }
+        return self._text_result({
+            "pattern": pattern,
+            "mode": mode,
+            "results_count": len(results),
+            "results": results
+        })
     
-    async def _read_file(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    def _read_file(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """파일 읽기"""
         file_path = arguments.get("path")
         
         if not file_path:
             raise ValueError("파일 경로가 필요합니다")
         
-        if not self.is_path_allowed(file_path):
+        if not self.is_path_allowed(file_path, resolve_leaf=True):
             raise PermissionError("접근 권한이 없습니다")
         
         ext = os.path.splitext(file_path)[1].lower()
         if ext not in self.allowed_extensions:
             raise ValueError("허용되지 않는 파일 형식입니다")
         
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        content, range_info = self._read_file_range(file_path, arguments)
+        
+        if content is None:
+            return {
+                "content": [{
+                    "type": "text",
+                    "text": f"파일: {file_path} (변경 없음, etag {range_info['etag']})"
+                }],
+                "range": range_info
+            }
+        
+        header = f"파일: {file_path}"
+        if range_info["length"] < range_info["total_size"]:
+            start = range_info["offset"]
+            header += f" (바이트 {start}-{start + range_info['length']} / {range_info['total_size']})"
         
         return {
             "content": [{
                 "type": "text",
-                "text": f"파일: {file_path}\n{'='*50}\n{content}"
-            }]
+                "text": f"{header}\n{'='*50}\n{content}"
+            }],
+            "range": range_info
         }
     
-    async def _write_file(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """파일 쓰기"""
+    def _prepare_write(self, arguments: Dict[str, Any]) -> Tuple[str, bytes, str]:
+        """쓰기 인자 검증 후 (경로, 데이터, 모드) 반환"""
         file_path = arguments.get("path")
         content = arguments.get("content", "")
+        mode = arguments.get("mode", "overwrite")
         
         if not file_path:
             raise ValueError("파일 경로가 필요합니다")
         
-        if not self.is_path_allowed(file_path):
+        if mode not in ("overwrite", "append"):
+            raise ValueError(f"지원하지 않는 쓰기 모드: {mode}")
+        
+        if not self.is_path_allowed(file_path, resolve_leaf=True):
             raise PermissionError("접근 권한이 없습니다")
         
         ext = os.path.splitext(file_path)[1].lower()
         if ext not in self.allowed_extensions:
             raise ValueError("허용되지 않는 파일 형식입니다")
         
-        # 디렉토리가 없으면 생성
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        return os.path.abspath(file_path), content.encode('utf-8'), mode
+    
+    def _commit_writes(self, entries: List[Tuple[str, bytes, str]], durable: bool) -> List[Dict[str, Any]]:
+        written = write_files_atomic(entries, durable)
+        record_request(files_touched=len(written))
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # 감시 이벤트보다 먼저 읽기 요청이 올 수 있으므로 캐시 즉시 갱신
+        for file_path, data, mode in entries:
+            if mode == "overwrite":
+                self.content_hashes.prime(file_path, data)
+            else:
+                self.content_hashes.invalidate(file_path)
+            if self.metadata_cache is not None:
+                self.metadata_cache.refresh_path(file_path)
+            self.result_cache.invalidate_path(file_path)
+        return written
+    
+    def _subscription_path(self, uri: str) -> str:
+        if not uri or not uri.startswith("file://"):
+            raise ValueError("지원하지 않는 URI 스키마")
+        file_path = uri[7:]
+        if not self.is_path_allowed(file_path, resolve_leaf=True):
+            raise PermissionError("접근 권한이 없습니다")
+        return file_path
+    
+    def subscribe(self, session: "ClientSession", uri: str):
+        """리소스 변경 알림 구독"""
+        if self.metadata_cache is None:
+            raise ValueError("변경 감시가 비활성화되어 구독할 수 없습니다")
+        self.subscriptions.subscribe(session, self._subscription_path(uri))
+    
+    def unsubscribe(self, session: "ClientSession", uri: str):
+        """리소스 변경 알림 구독 해제"""
+        self.subscriptions.unsubscribe(session, self._subscription_path(uri))
+    
+    def _write_file(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """파일 쓰기 (임시 파일 + 이름 변경으로 원자적 교체, 또는 이어 쓰기)"""
+        file_path, data, mode = self._prepare_write(arguments)
+        self._commit_writes([(file_path, data, mode)], arguments.get("durable", True))
         
         return {
             "content": [{
@@ -360,84 +2995,132 @@ class FileSystemMCPServer:
             }]
         }
     
-    async def _list_directory(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    def _write_files(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """여러 파일을 한 번에 쓰기 (모두 검증한 뒤 기록, 디렉토리 fsync는 한 번씩)"""
+        files = arguments.get("files") or []
+        if not files:
+            raise ValueError("쓸 파일 목록이 필요합니다")
+        
+        entries = [self._prepare_write(item) for item in files]
+        if len({path for path, _, _ in entries}) != len(entries):
+            raise ValueError("같은 경로가 여러 번 포함되어 있습니다")
+        
+        written = self._commit_writes(entries, arguments.get("durable", True))
+        return self._text_result({
+            "files_written": len(written),
+            "bytes_written": sum(item["bytes"] for item in written),
+            "files": written
+        })
+    
+    def _list_directory(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """디렉토리 목록"""
         dir_path = arguments.get("path", self.project_root)
         
-        if not self.is_path_allowed(dir_path):
+        if not self.is_path_allowed(dir_path, resolve_leaf=True):
             raise PermissionError("접근 권한이 없습니다")
         
         if not os.path.isdir(dir_path):
             raise ValueError("유효한 디렉토리가 아닙니다")
         
-        items = []
-        for item in sorted(os.listdir(dir_path)):
-            if item not in self.excluded_dirs:
-                item_path = os.path.join(dir_path, item)
-                items.append(self.get_file_info(item_path))
+        limit = max(1, min(int(arguments.get("limit") or self.list_page_size), self.list_page_size))
+        after = None
+        if arguments.get("cursor"):
+            state = decode_cursor(arguments["cursor"])
+            if state.get("d") != os.path.abspath(dir_path):
+                raise ValueError("다른 디렉토리의 커서입니다")
+            after = state.get("a")
         
-        return {
-            "content": [{
-                "type": "text",
-                "text": json.dumps({
-                    "directory": dir_path,
-                    "items": items
-                }, indent=2, ensure_ascii=False)
-            }]
-        }
+        # 이름순으로 after 다음 limit + 1개만 선택 (디렉토리 전체 정보를 만들지 않음)
+        page = None
+        if self._cache_ready(dir_path):
+            page = self.metadata_cache.list_dir(dir_path, after, limit + 1, self.excluded_dirs)
+        if page is None:
+            page = self.dir_listings.page(dir_path, after, limit + 1, self.excluded_dirs)
+        
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor({"d": os.path.abspath(dir_path), "a": page[-1]})
+        
+        items = [self.get_file_info(os.path.join(dir_path, item)) for item in page]
+        
+        return self._text_result({
+            "directory": dir_path,
+            "items": items,
+            "next_cursor": next_cursor
+        })
     
-    async def _file_stats(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    def _file_stats(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """파일 통계"""
         path = arguments.get("path", self.project_root)
         
-        if not self.is_path_allowed(path):
+        if not self.is_path_allowed(path, resolve_leaf=True):
             raise PermissionError("접근 권한이 없습니다")
         
-        stats = {
-            "total_files": 0,
-            "total_directories": 0, 
-            "total_size": 0,
-            "file_types": {},
-            "largest_files": []
-        }
+        cache_key = ResultCache.make_key("file_stats", {"path": os.path.abspath(path)})
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return self._text_result(cached)
         
-        file_sizes = []
+        tree_stats = TreeStats(top_n=10)
+        validator = None
         
         try:
-            for root, dirs, files in os.walk(path):
-                dirs[:] = [d for d in dirs if d not in self.excluded_dirs]
-                stats["total_directories"] += len(dirs)
-                
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        size = os.path.getsize(file_path)
-                        ext = os.path.splitext(file)[1].lower() or "no_extension"
-                        
-                        stats["total_files"] += 1
-                        stats["total_size"] += size
-                        stats["file_types"][ext] = stats["file_types"].get(ext, 0) + 1
-                        
-                        file_sizes.append((file_path, size))
-                        
-                    except OSError:
-                        continue
-            
-            # 가장 큰 파일들 (상위 10개)
-            file_sizes.sort(key=lambda x: x[1], reverse=True)
-            stats["largest_files"] = [
-                {"path": path, "size": size} 
-                for path, size in file_sizes[:10]
-            ]
-            
+            if self._cache_ready(path):
+                # 캐시된 메타데이터로 계산 (파일 시스템 접근 없음)
+                for root, dirs, files in self.metadata_cache.walk(path):
+                    dirs[:] = [d for d in dirs if d not in self.excluded_dirs]
+                    tree_stats.total_directories += len(dirs)
+                    for file in files:
+                        info = self.metadata_cache.get(os.path.join(root, file))
+                        if info:
+                            tree_stats.add_file(info["path"], file, info["size"])
+            else:
+                # 감시되지 않는 경로는 디렉토리 mtime으로 캐시 유효성 확인
+                dir_mtimes = None if self._is_watched(path) else {}
+                tree_stats = walk_tree_stats(
+                    path, self.excluded_dirs,
+                    self.executor.walk_pool, self.executor.walk_workers,
+                    dir_mtimes=dir_mtimes
+                )
+                if dir_mtimes is not None:
+                    validator = dir_mtime_validator(dir_mtimes)
         except Exception as e:
             logger.error(f"통계 생성 오류: {e}")
+            return self._text_result(tree_stats.to_dict())
         
+        # 인코딩은 세션마다 다르므로 직렬화 전 결과를 캐시
+        result = tree_stats.to_dict()
+        record_request(files_touched=result.get("total_files", 0))
+        self.result_cache.put(
+            cache_key, result, [os.path.abspath(path)],
+            size=len(dumps_compact(result)), validator=validator
+        )
+        return self._text_result(result)
+    
+    @staticmethod
+    def _text_result(data: Any) -> Dict[str, Any]:
+        """구조화된 도구 결과 (json은 text, 그 외 협상된 인코딩은 blob 항목)"""
+        encoded = encode_result_data(data)
+        if "text" in encoded:
+            return {"content": [{"type": "text", "text": encoded["text"]}]}
+        return {"content": [dict(type="blob", **encoded)]}
+    
+    def _server_stats(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """서버 내부 지표 (워커 풀 대기열 등)"""
+        return self._text_result(self.collect_stats())
+    
+    def collect_stats(self) -> Dict[str, Any]:
+        """메서드별 지표와 내부 구성 요소 상태 (server/stats 응답)"""
         return {
-            "content": [{
-                "type": "text",
-                "text": json.dumps(stats, indent=2, ensure_ascii=False)
-            }]
+            **self.metrics.snapshot(),
+            "executor": self.executor.snapshot(),
+            "scheduler": self.scheduler.snapshot(),
+            "result_cache": self.result_cache.snapshot(),
+            "subscriptions": self.subscriptions.snapshot(),
+            "content_hashes": self.content_hashes.snapshot(),
+            "file_types": self.file_types.snapshot(),
+            "dir_listings": self.dir_listings.snapshot()
         }
     
     def get_tools(self) -> List[Dict[str, Any]]:
@@ -451,7 +3134,20 @@ class FileSystemMCPServer:
                     "properties": {
                         "pattern": {"type": "string", "description": "검색할 패턴"},
                         "search_in_content": {"type": "boolean", "description": "파일 내용에서도 검색할지 여부"},
-                        "max_results": {"type": "integer", "description": "최대 결과 수", "default": 20}
+                        "max_results": {"type": "integer", "description": "최대 결과 수", "default": 20},
+                        "mode": {
+                            "type": "string",
+                            "enum": ["substring", "multi", "regex"],
+                            "description": "내용 검색 방식 (부분 문자열, 여러 리터럴, 정규식)",
+                            "default": "substring"
+                        },
+                        "patterns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "multi 모드에서 찾을 리터럴 목록"
+                        },
+                        "case_sensitive": {"type": "boolean", "description": "대소문자 구분 여부", "default": False},
+                        "max_matches_per_file": {"type": "integer", "description": "파일당 최대 일치 줄 수", "default": 5}
                     },
                     "required": ["pattern"]
                 }
@@ -462,7 +3158,13 @@ class FileSystemMCPServer:
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "path": {"type": "string", "description": "읽을 파일 경로"}
+                        "path": {"type": "string", "description": "읽을 파일 경로"},
+                        "offset": {"type": "integer", "description": "읽기 시작 바이트 위치"},
+                        "length": {"type": "integer", "description": "읽을 최대 바이트 수"},
+                        "start_line": {"type": "integer", "description": "읽기 시작 줄 번호 (1부터)"},
+                        "end_line": {"type": "integer", "description": "마지막 줄 번호 (포함)"},
+                        "cursor": {"type": "string", "description": "이전 응답의 next_cursor로 이어 읽기"},
+                        "if_none_match": {"type": "string", "description": "이전 응답의 etag (같으면 내용 없이 변경 없음만 반환)"}
                     },
                     "required": ["path"]
                 }
@@ -474,18 +3176,51 @@ class FileSystemMCPServer:
                     "type": "object", 
                     "properties": {
                         "path": {"type": "string", "description": "쓸 파일 경로"},
-                        "content": {"type": "string", "description": "파일 내용"}
+                        "content": {"type": "string", "description": "파일 내용"},
+                        "mode": {
+                            "type": "string",
+                            "enum": ["overwrite", "append"],
+                            "description": "overwrite는 원자적 교체, append는 이어 쓰기",
+                            "default": "overwrite"
+                        },
+                        "durable": {"type": "boolean", "description": "fsync로 디스크 반영 보장", "default": True}
                     },
                     "required": ["path", "content"]
                 }
             },
+            {
+                "name": "write_files",
+                "description": "여러 파일을 한 번의 호출로 쓰기",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "description": "쓸 파일 목록",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "path": {"type": "string"},
+                                    "content": {"type": "string"},
+                                    "mode": {"type": "string", "enum": ["overwrite", "append"]}
+                                },
+                                "required": ["path", "content"]
+                            }
+                        },
+                        "durable": {"type": "boolean", "description": "fsync로 디스크 반영 보장", "default": True}
+                    },
+                    "required": ["files"]
+                }
+            },
             {
                 "name": "list_directory",
                 "description": "디렉토리 내용 목록",
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "path": {"type": "string", "description": "목록을 볼 디렉토리 경로"}
+                        "path": {"type": "string", "description": "목록을 볼 디렉토리 경로"},
+                        "limit": {"type": "integer", "description": "한 번에 반환할 최대 항목 수"},
+                        "cursor": {"type": "string", "description": "이전 응답의 next_cursor (다음 페이지 조회)"}
                     }
                 }
             },
@@ -498,78 +3233,207 @@ class FileSystemMCPServer:
                         "path": {"type": "string", "description": "통계를 생성할 경로"}
                     }
                 }
+            },
+            {
+                "name": "server_stats",
+                "description": "서버 내부 지표 (워커 풀 대기열, 도구별 실행 현황, 결과 캐시 적중률)",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {}
+                }
             }
         ]
 
+class ClientSession:
+    """클라이언트 연결 하나의 상태"""
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, send: Callable[[Any], Awaitable[None]] = None):
+        self.session_id = f"session-{next(self._ids)}"
+        self.client_info: Dict[str, Any] = {}
+        self.result_encoding = "json"
+        self.subscriptions: set = set()
+        self._send = send
+    
+    @property
+    def client_id(self) -> str:
+        """스케줄러 한도를 적용할 클라이언트 (clientInfo 이름이 있으면 연결이 달라도 공유)"""
+        return self.client_info.get("name") or self.session_id
+    
+    async def notify(self, message: Dict[str, Any]):
+        """클라이언트로 알림 전송 (전송 수단이 없으면 무시)"""
+        if self._send is not None:
+            await self._send(message)
+
 # JSON-RPC 2.0 메시지 처리
-async def handle_jsonrpc_message(server: FileSystemMCPServer, message: Dict[str, Any]) -> Dict[str, Any]:
-    """JSON-RPC 2.0 메시지 처리"""
+class PreSerialized(dict):
+    """직렬화한 JSON을 함께 보관하는 고정 결과 (tools/list 등)
+
+    전송할 때 다시 직렬화하지 않고 json 문자열을 응답에 그대로 이어 붙이므로
+    만든 뒤에는 수정하지 않아야 합니다.
+    """
+    
+    __slots__ = ("json",)
+    
+    def __init__(self, data: Dict[str, Any]):
+        super().__init__(data)
+        self.json = dumps_compact(data)
+
+def serialize_message(payload: Any) -> str:
+    """응답(또는 배치) 직렬화 (PreSerialized 결과는 저장된 문자열을 id와 이어 붙임)"""
+    if isinstance(payload, list):
+        return "[" + ",".join(serialize_message(item) for item in payload) + "]"
+    if isinstance(payload, dict) and isinstance(payload.get("result"), PreSerialized):
+        return '{"jsonrpc":"2.0","id":%s,"result":%s}' % (dumps_compact(payload.get("id")), payload["result"].json)
+    return dumps_compact(payload)
+
+class JSONRPCError(Exception):
+    """처리기가 특정 JSON-RPC 오류 코드로 응답할 때 사용"""
     
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+# JSON-RPC 메서드 등록표 (메서드 이름 -> async 처리기(server, params, session) -> result)
+METHOD_HANDLERS: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+def jsonrpc_method(name: str):
+    """METHOD_HANDLERS에 처리기를 등록하는 데코레이터"""
+    def register(handler):
+        METHOD_HANDLERS[name] = handler
+        return handler
+    return register
+
+@jsonrpc_method("initialize")
+async def _rpc_initialize(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    accepted = params.get("capabilities", {}).get("experimental", {}).get("resultEncoding", {})
+    encoding = negotiate_result_encoding(accepted.get("accept"))
+    if session is not None:
+        session.client_info = params.get("clientInfo", {})
+        session.result_encoding = encoding
+    return server.initialize_result(encoding)
+
+@jsonrpc_method("resources/list")
+async def _rpc_resources_list(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    return await server.list_resources(params.get("cursor"))
+
+@jsonrpc_method("resources/read")
+async def _rpc_resources_read(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    return await server.read_resource(params.get("uri"), params, session.notify if session else None)
+
+@jsonrpc_method("resources/subscribe")
+async def _rpc_resources_subscribe(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    if session is None:
+        raise ValueError("구독에는 클라이언트 연결이 필요합니다")
+    server.subscribe(session, params.get("uri"))
+    return {}
+
+@jsonrpc_method("resources/unsubscribe")
+async def _rpc_resources_unsubscribe(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    if session is None:
+        raise ValueError("구독에는 클라이언트 연결이 필요합니다")
+    server.unsubscribe(session, params.get("uri"))
+    return {}
+
+@jsonrpc_method("server/stats")
+async def _rpc_server_stats(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    return server.collect_stats()
+
+@jsonrpc_method("tools/list")
+async def _rpc_tools_list(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    return server.tools_list_result
+
+@jsonrpc_method("tools/call")
+async def _rpc_tools_call(server: FileSystemMCPServer, params: Dict[str, Any], session: ClientSession):
+    name = params.get("name")
+    arguments = params.get("arguments", {})
+    client = session.client_id if session is not None else "local"
+    try:
+        return await server.scheduler.run(client, name, lambda: server.call_tool(name, arguments))
+    except QuotaExceeded as e:
+        raise JSONRPCError(-32000, f"요청 한도 초과: {e}", {"retryAfter": round(e.retry_after, 3)})
+
+def _metric_key(server: FileSystemMCPServer, method: Any, params: Dict[str, Any]) -> str:
+    """지표 키 (등록되지 않은 메서드/도구는 하나로 묶어 키 수가 늘지 않게 함)"""
+    if method not in METHOD_HANDLERS:
+        return "(unknown)"
+    if method == "tools/call":
+        name = params.get("name")
+        return f"tools/call:{name if name in server.tool_handlers else '(unknown)'}"
+    return method
+
+def _payload_size(response: Dict[str, Any]) -> int:
+    """응답에 담긴 본문(text/blob) 크기 (본문 항목이 없는 작은 결과는 직렬화 크기)"""
+    result = response.get("result") if isinstance(response, dict) else None
+    if not isinstance(result, dict):
+        return 0
+    if isinstance(result, PreSerialized):
+        return len(result.json)
+    items = result.get("content") or result.get("contents")
+    if items is None:
+        return len(dumps_compact(result))
+    return sum(len(item.get("text") or item.get("blob") or "") for item in items if isinstance(item, dict))
+
+async def handle_jsonrpc_message(server: FileSystemMCPServer, message: Dict[str, Any],
+                                 session: ClientSession = None, size: int = 0) -> Dict[str, Any]:
+    """JSON-RPC 2.0 메시지 처리
+
+    session은 메시지를 보낸 클라이언트 연결로, 응답 전에 알림을 보낼 때
+    사용합니다 (resources/read 스트리밍 등). size는 수신한 메시지 바이트 수로
+    지표에만 쓰입니다.
+    """
+    params = message.get("params") or {}
+    key = _metric_key(server, message.get("method"), params)
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    started = time.perf_counter()
+    response = None
+    try:
+        with server.metrics.span(key) as span:
+            response = await _handle_method(server, message, session)
+            if span is not None:
+                span.set_attributes({"mcp.bytes_in": size, **{f"mcp.{k}": v for k, v in stats.counts.items()}})
+        return response
+    finally:
+        request_stats.reset(token)
+        server.metrics.observe(
+            key, time.perf_counter() - started,
+            response is None or "error" in response or _is_error_result(response),
+            stats, size, _payload_size(response) if response else 0
+        )
+
+def _is_error_result(response: Dict[str, Any]) -> bool:
+    """도구/리소스 오류는 JSON-RPC 오류가 아니라 isError가 참인 결과로 반환됨"""
+    result = response.get("result")
+    return isinstance(result, dict) and bool(result.get("isError"))
+
+async def _handle_method(server: FileSystemMCPServer, message: Dict[str, Any],
+                         session: ClientSession = None) -> Dict[str, Any]:
     method = message.get("method")
-    params = message.get("params", {})
     message_id = message.get("id")
+    if session is not None:
+        result_encoding.set(session.result_encoding)
     
-    try:
-        if method == "initialize":
-            return {
-                "jsonrpc": "2.0",
-                "id": message_id,
-                "result": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": server.server.capabilities,
-                    "serverInfo": {
-                        "name": server.server.name,
-                        "version": server.server.version
-                    }
-                }
-            }
-        
-        elif method == "resources/list":
-            result = await server.list_resources()
-            return {
-                "jsonrpc": "2.0",
-                "id": message_id,
-                "result": result
-            }
-        
-        elif method == "resources/read":
-            uri = params.get("uri")
-            result = await server.read_resource(uri)
-            return {
-                "jsonrpc": "2.0", 
-                "id": message_id,
-                "result": result
-            }
-        
-        elif method == "tools/list":
-            return {
-                "jsonrpc": "2.0",
-                "id": message_id,
-                "result": {
-                    "tools": server.get_tools()
-                }
-            }
-        
-        elif method == "tools/call":
-            name = params.get("name")
-            arguments = params.get("arguments", {})
-            result = await server.call_tool(name, arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": message_id,
-                "result": result
-            }
-        
-        else:
-            return {
-                "jsonrpc": "2.0",
-                "id": message_id,
-                "error": {
-                    "code": -32601,
-                    "message": f"알 수 없는 메서드: {method}"
-                }
+    handler = METHOD_HANDLERS.get(method)
+    if handler is None:
+        return {
+            "jsonrpc": "2.0",
+            "id": message_id,
+            "error": {
+                "code": -32601,
+                "message": f"알 수 없는 메서드: {method}"
             }
-            
+        }
+    
+    try:
+        result = await handler(server, message.get("params") or {}, session)
+    except JSONRPCError as e:
+        error = {"code": e.code, "message": str(e)}
+        if e.data is not None:
+            error["data"] = e.data
+        return {"jsonrpc": "2.0", "id": message_id, "error": error}
     except Exception as e:
         logger.error(f"메시지 처리 오류: {e}")
         return {
@@ -580,18 +3444,213 @@ async def handle_jsonrpc_message(server: FileSystemMCPServer, message: Dict[str,
                 "message": f"내부 오류: {str(e)}"
             }
         }
+    
+    return {
+        "jsonrpc": "2.0",
+        "id": message_id,
+        "result": result
+    }
+
+class JSONRPCConnection:
+    """하나의 연결에서 JSON-RPC 메시지를 읽어 동시에 처리
+
+    줄 단위 JSON과 Content-Length 헤더 프레이밍을 모두 받으며, 응답은
+    클라이언트가 보낸 것과 같은 프레이밍으로 완료되는 순서대로 씁니다.
+    동시에 처리하는 요청 수는 max_concurrency로 제한합니다.
+    """
+    
+    MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+    
+    def __init__(self, server: FileSystemMCPServer, reader: asyncio.StreamReader,
+                 writer, max_concurrency: int = 16):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.session = ClientSession(self.send)
+        self.max_pending = max_concurrency * 4
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._write_lock = asyncio.Lock()
+        self._tasks: set = set()
+        self._use_headers = False
+    
+    async def read_message(self) -> Optional[bytes]:
+        """다음 메시지 본문 (연결이 끝나면 None)"""
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return None
+            if not line.strip():
+                continue
+            if not line.lower().startswith(b"content-length:"):
+                return line
+            
+            # Content-Length 프레이밍: 빈 줄까지 헤더를 읽은 뒤 본문을 정확히 읽음
+            self._use_headers = True
+            length = int(line.split(b":", 1)[1])
+            while (await self.reader.readline()).strip():
+                pass
+            if length > self.MAX_MESSAGE_SIZE:
+                raise ValueError(f"메시지가 너무 큽니다: {length} bytes")
+            return await self.reader.readexactly(length)
+    
+    async def send(self, payload: Any):
+        """메시지 하나를 직렬화해 전송"""
+        body = serialize_message(payload).encode("utf-8")
+        if self._use_headers:
+            frame = f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+        else:
+            frame = body + b"\n"
+        async with self._write_lock:
+            self.writer.write(frame)
+            await self.writer.drain()
+    
+    async def _handle_one(self, message: Any, size: int = 0) -> Optional[Dict[str, Any]]:
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+            return {
+                "jsonrpc": "2.0",
+                "id": message.get("id") if isinstance(message, dict) else None,
+                "error": {"code": -32600, "message": "잘못된 요청입니다"}
+            }
+        async with self._semaphore:
+            response = await handle_jsonrpc_message(self.server, message, self.session, size)
+        # id가 없는 알림에는 응답하지 않음
+        return response if "id" in message else None
+    
+    async def _dispatch(self, raw: bytes):
+        try:
+            payload = json.loads(raw)
+        except ValueError as e:
+            await self.send({
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32700, "message": f"파싱 오류: {e}"}
+            })
+            return
+        
+        if isinstance(payload, list):
+            # 배치 요청: 항목들을 동시에 처리하고 응답을 배열로 묶어 전송
+            if not payload:
+                await self.send({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": -32600, "message": "빈 배치 요청입니다"}
+                })
+                return
+            size = len(raw) // len(payload)
+            responses = await asyncio.gather(*(self._handle_one(item, size) for item in payload))
+            responses = [r for r in responses if r is not None]
+            if responses:
+                await self.send(responses)
+        else:
+            response = await self._handle_one(payload, len(raw))
+            if response is not None:
+                await self.send(response)
+    
+    async def serve(self):
+        """연결이 끝날 때까지 메시지 처리"""
+        try:
+            while True:
+                raw = await self.read_message()
+                if raw is None:
+                    break
+                
+                # 처리 대기 중인 요청이 너무 많으면 읽기를 잠시 멈춤 (역압)
+                if len(self._tasks) >= self.max_pending:
+                    await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                
+                task = asyncio.create_task(self._dispatch(raw))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            logger.error(f"연결 읽기 오류: {e}")
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            self.server.subscriptions.drop_session(self.session)
+            self.server.scheduler.forget(self.session.client_id)
+
+class _StdoutWriter:
+    """파이프 연결이 불가능한 stdout용 최소 writer"""
+    
+    def write(self, data: bytes):
+        sys.stdout.buffer.write(data)
+    
+    async def drain(self):
+        sys.stdout.buffer.flush()
+
+async def serve_stdio(server: FileSystemMCPServer, max_concurrency: int = 16):
+    """stdin/stdout으로 JSON-RPC 서비스"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=JSONRPCConnection.MAX_MESSAGE_SIZE)
+    
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except ValueError:
+        # 일반 파일로 리다이렉트된 경우 등은 스레드에서 읽어 전달
+        def pump():
+            for chunk in iter(lambda: sys.stdin.buffer.read1(64 * 1024), b""):
+                loop.call_soon_threadsafe(reader.feed_data, chunk)
+            loop.call_soon_threadsafe(reader.feed_eof)
+        threading.Thread(target=pump, name="stdin-reader", daemon=True).start()
+    
+    try:
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    except ValueError:
+        writer = _StdoutWriter()
+    
+    await JSONRPCConnection(server, reader, writer, max_concurrency).serve()
+
+async def serve_socket(server: FileSystemMCPServer, host: str = None, port: int = None,
+                       socket_path: str = None, max_concurrency: int = 16):
+    """TCP 또는 Unix 소켓으로 JSON-RPC 서비스 (연결마다 독립 세션)"""
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername") or socket_path
+        logger.info(f"클라이언트 연결: {peer}")
+        try:
+            await JSONRPCConnection(server, reader, writer, max_concurrency).serve()
+        finally:
+            writer.close()
+            logger.info(f"클라이언트 연결 종료: {peer}")
+    
+    limit = JSONRPCConnection.MAX_MESSAGE_SIZE
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        listener = await asyncio.start_unix_server(on_connect, path=socket_path, limit=limit)
+        logger.info(f"Unix 소켓 대기 중: {socket_path}")
+    else:
+        listener = await asyncio.start_server(on_connect, host, port, limit=limit)
+        logger.info(f"TCP 대기 중: {host}:{port}")
+    
+    async with listener:
+        await listener.serve_forever()
 
 async def main():
     """메인 서버 실행"""
+    parser = argparse.ArgumentParser(description="MCP 파일 시스템 서버")
+    parser.add_argument("--transport", choices=["stdio", "tcp", "unix"], default="stdio",
+                        help="전송 방식 (기본: stdio)")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP 바인드 주소")
+    parser.add_argument("--port", type=int, default=8765, help="TCP 포트")
+    parser.add_argument("--socket", default="/tmp/mcp-filesystem.sock", help="Unix 소켓 경로")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="연결당 동시 처리 요청 수")
+    args = parser.parse_args()
+    
     # 환경 변수에서 프로젝트 루트 가져오기
     project_root = os.environ.get("PROJECT_ROOT", os.getcwd())
     
     server = FileSystemMCPServer(project_root)
-    logger.info(f"파일 시스템 MCP 서버 시작됨")
+    logger.info(f"파일 시스템 MCP 서버 시작됨 ({args.transport})")
     logger.info(f"프로젝트 루트: {project_root}")
     
-    print("MCP 파일 시스템 서버가 준비되었습니다.")
-    print(f"프로젝트 루트: {project_root}")
+    # stdout은 프로토콜 채널이므로 안내 메시지는 로그(stderr)로만 출력
+    if args.transport == "stdio":
+        await serve_stdio(server, args.max_concurrency)
+    elif args.transport == "tcp":
+        await serve_socket(server, host=args.host, port=args.port, max_concurrency=args.max_concurrency)
+    else:
+        await serve_socket(server, socket_path=args.socket, max_concurrency=args.max_concurrency)
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -8,20 +8,33 @@ A2A 데이터 분석 에이전트
 """
 
 import asyncio
+import heapq
+import itertools
 import json
+import math
+import os
+import time
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
 import uuid
 import logging
 from datetime import datetime
 import io
 import base64
+import threading
+import contextvars
+import concurrent.futures
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from collections import OrderedDict, deque
 from pathlib import Path
 import argparse
 
@@ -55,6 +68,7 @@ class TaskResponse(BaseModel):
     error: Optional[str] = None
     progress: Optional[int] = None
     estimated_completion: Optional[str] = None
+    queue_position: Optional[int] = None  # 대기 중이면 1부터 시작하는 순서
 
 class TaskUpdate(BaseModel):
     task_id: str
@@ -64,17 +78,767 @@ class TaskUpdate(BaseModel):
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+# 스트리밍 로드 시 한 번에 읽을 행 수
+DATA_CHUNK_ROWS = int(os.environ.get("DATA_ANALYST_CHUNK_ROWS", "100000"))
+
+# 변경이 없을 때 SSE 연결 유지용 주석을 보내는 간격 (초)
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("DATA_ANALYST_SSE_KEEPALIVE", "15"))
+
+# 데이터셋 캐시 메모리 예산 (바이트)
+DATASET_CACHE_BYTES = int(os.environ.get("DATA_ANALYST_CACHE_BYTES", str(512 * 1024 * 1024)))
+
+# 파일 확장자 -> (형식, 압축)
+DATA_FORMATS = {".csv": "csv", ".tsv": "tsv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json"}
+COMPRESSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zip": "zip", ".zst": "zstd"}
+
+def dataset_format(path: str) -> Tuple[str, Optional[str]]:
+    """파일 이름으로 (형식, 압축 방식) 판별"""
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    compression = COMPRESSIONS.get(suffixes[-1]) if suffixes else None
+    if compression:
+        suffixes = suffixes[:-1]
+    data_format = DATA_FORMATS.get(suffixes[-1]) if suffixes else None
+    if data_format is None:
+        raise ValueError(f"지원하지 않는 데이터 형식입니다: {Path(path).name}")
+    return data_format, compression
+
+class QuantileSketch:
+    """병합 가능한 근사 분위수 스케치
+
+    값을 (평균, 가중치) 중심점으로 요약하고, 중심점이 max_centroids개를 넘으면
+    누적 순위가 같은 구간끼리 합칩니다. 메모리는 고정이고 순위 오차는 전체 개수의
+    약 1/max_centroids이며, 값이 max_centroids개 이하이면 정확한 값을 돌려줍니다.
+    """
+    
+    def __init__(self, max_centroids: int = 1024):
+        self.max_centroids = max_centroids
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+    
+    def add(self, values: np.ndarray):
+        if values.size:
+            self._compress(np.concatenate([self.means, values.astype(float)]),
+                           np.concatenate([self.weights, np.ones(values.size)]))
+    
+    def merge(self, other: "QuantileSketch"):
+        if other.weights.size:
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+    
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        if means.size > self.max_centroids:
+            # 앞선 가중치 합(순위)으로 구간을 정해 가중 평균으로 합침
+            ranks = np.cumsum(weights) - weights
+            groups = (ranks / weights.sum() * self.max_centroids).astype(np.int64)
+            totals = np.bincount(groups, weights=weights)
+            sums = np.bincount(groups, weights=means * weights)
+            used = totals > 0
+            means, weights = sums[used] / totals[used], totals[used]
+        self.means, self.weights = means, weights
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.weights.size:
+            return None
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), centers, self.means))
+
+class ColumnAccumulator:
+    """한 번의 순회로 계산하는 병합 가능한 수치 열 통계
+
+    청크별 개수/평균/편차제곱합을 Chan의 병렬 분산 공식으로 합치므로
+    청크 순서나 분할 방식과 관계없이 같은 평균과 표준편차가 나옵니다.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch()
+    
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if values.size:
+            mean = float(values.mean())
+            self._combine(values.size, mean, float(np.square(values - mean).sum()),
+                          float(values.min()), float(values.max()))
+            self.sketch.add(values)
+    
+    def merge(self, other: "ColumnAccumulator"):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+    
+    def _combine(self, count: int, mean: float, m2: float, low: float, high: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"mean": None, "median": None, "std": None, "min": None, "max": None, "count": 0}
+        return {
+            "mean": self.mean,
+            "median": self.sketch.quantile(0.5),
+            # pandas의 std와 같은 표본 표준편차 (ddof=1)
+            "std": math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None,
+            "min": self.min,
+            "max": self.max,
+            "count": self.count
+        }
+
+class DatasetAccumulator:
+    """청크 단위로 쌓는 데이터셋 통계 (열별 ColumnAccumulator)
+
+    어느 청크에서든 수치가 아닌 값이 나온 열은 수치 열에서 제외합니다.
+    """
+    
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.column_names: List[str] = []
+        self.columns: Dict[str, ColumnAccumulator] = {}
+        self.non_numeric: set = set()
+    
+    def update(self, df: pd.DataFrame):
+        self.rows += len(df)
+        self.chunks += 1
+        numeric = set(df.select_dtypes(include=[np.number]).columns)
+        for col in df.columns:
+            name = str(col)
+            if name not in self.column_names:
+                self.column_names.append(name)
+            if name in self.non_numeric:
+                continue
+            if col in numeric:
+                accumulator = self.columns.get(name)
+                if accumulator is None:
+                    accumulator = self.columns[name] = ColumnAccumulator()
+                accumulator.update(df[col].to_numpy(dtype=float, na_value=np.nan))
+            elif df[col].notna().any():
+                self.non_numeric.add(name)
+                self.columns.pop(name, None)
+    
+    def merge(self, other: "DatasetAccumulator"):
+        self.rows += other.rows
+        self.chunks += other.chunks
+        for name in other.column_names:
+            if name not in self.column_names:
+                self.column_names.append(name)
+        self.non_numeric |= other.non_numeric
+        for name, accumulator in other.columns.items():
+            if name not in self.non_numeric:
+                self.columns.setdefault(name, ColumnAccumulator()).merge(accumulator)
+        for name in self.non_numeric:
+            self.columns.pop(name, None)
+    
+    def statistics(self) -> Dict[str, Dict[str, Any]]:
+        return {name: accumulator.to_dict() for name, accumulator in self.columns.items()}
+
+class ChunkedDatasetReader:
+    """CSV/TSV/JSON Lines 파일을 chunk_rows 행씩 읽는 리더
+
+    압축 파일(.gz 등)도 그대로 읽으며, 진행률은 원본 파일에서 읽은 바이트로
+    계산합니다. 줄 단위가 아닌 .json(배열)은 나눠 읽을 수 없어 한 번에 읽습니다.
+    """
+    
+    def __init__(self, path: str, chunk_rows: int = DATA_CHUNK_ROWS):
+        self.path = path
+        self.data_format, self.compression = dataset_format(path)
+        self.size = os.path.getsize(path)
+        self._handle = open(path, "rb")
+        if self.data_format in ("csv", "tsv"):
+            self._reader = pd.read_csv(
+                self._handle, sep="\t" if self.data_format == "tsv" else ",",
+                chunksize=chunk_rows, compression=self.compression
+            )
+        elif self.data_format == "jsonl":
+            self._reader = pd.read_json(
+                self._handle, lines=True, chunksize=chunk_rows, compression=self.compression
+            )
+        else:
+            self._reader = iter([pd.read_json(self._handle, compression=self.compression)])
+    
+    def __iter__(self):
+        return iter(self._reader)
+    
+    def read_into(self, accumulator: DatasetAccumulator) -> bool:
+        """다음 청크를 읽어 accumulator에 반영 (더 읽을 것이 없으면 False)"""
+        chunk = next(self._reader, None)
+        if chunk is None:
+            return False
+        accumulator.update(chunk)
+        return True
+    
+    def progress(self) -> float:
+        if self._handle.closed or not self.size:
+            return 1.0
+        return min(1.0, self._handle.tell() / self.size)
+    
+    def close(self):
+        close = getattr(self._reader, "close", None)
+        if close is not None:
+            close()
+        self._handle.close()
+
+def compact_dataframe(df: pd.DataFrame, max_category_ratio: float = 0.5) -> pd.DataFrame:
+    """정수 열은 가장 작은 정수형으로, 값이 많이 반복되는 문자열 열은 category로 변환
+
+    실수 열은 통계 정밀도를 유지하도록 float64 그대로 둡니다.
+    """
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            if len(series) and series.nunique() <= len(series) * max_category_ratio:
+                df[col] = series.astype("category")
+    return df
+
+def load_dataframe(path: str, chunk_rows: int = DATA_CHUNK_ROWS) -> pd.DataFrame:
+    """파일 전체를 작은 자료형의 DataFrame으로 로드
+
+    청크마다 정수 열을 줄인 뒤 합치므로 int64 원본 전체가 메모리에 동시에
+    올라가지 않습니다.
+    """
+    reader = ChunkedDatasetReader(path, chunk_rows)
+    try:
+        chunks = []
+        for chunk in reader:
+            for col in chunk.select_dtypes(include=["integer"]).columns:
+                chunk[col] = pd.to_numeric(chunk[col], downcast="integer")
+            chunks.append(chunk)
+    finally:
+        reader.close()
+    if not chunks:
+        return pd.DataFrame()
+    return compact_dataframe(pd.concat(chunks, ignore_index=True))
+
+class DatasetCache:
+    """프로세스 전역 데이터셋 캐시 (경로 + mtime/크기 기준, 메모리 예산 내 LRU)
+
+    파일이 바뀌면 키가 달라져 다시 로드하고, 같은 파일을 여러 작업이 동시에
+    요청하면 먼저 시작한 로드를 기다려 파싱은 한 번만 합니다. 캐시된
+    DataFrame은 작업 간에 공유되므로 읽기 전용으로 다뤄야 합니다.
+    """
+    
+    def __init__(self, max_bytes: int = DATASET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._loading: Dict[Tuple[str, int, int], threading.Event] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _key(path: str) -> Tuple[str, int, int]:
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+    
+    def peek(self, path: str) -> Optional[pd.DataFrame]:
+        """캐시에 있으면 반환 (없어도 로드하지 않음)"""
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def get(self, path: str, chunk_rows: int = DATA_CHUNK_ROWS) -> pd.DataFrame:
+        """캐시에서 반환하거나 로드 후 저장 (블로킹, 워커 스레드에서 호출)"""
+        key = self._key(path)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                event = self._loading.get(key)
+                if event is None:
+                    event = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # 다른 작업이 로드 중이면 끝나길 기다렸다가 다시 조회 (실패했으면 직접 로드)
+            event.wait()
+        
+        try:
+            df = load_dataframe(path, chunk_rows)
+            self._store(key, df)
+            return df
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+    
+    def _store(self, key: Tuple[str, int, int], df: pd.DataFrame):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            # 같은 파일의 이전 버전 제거
+            for old_key in [k for k in self._entries if k[0] == key[0]]:
+                self.bytes -= self._entries.pop(old_key)[1]
+            if size > self.max_bytes:
+                logger.info(f"데이터셋이 캐시 예산보다 커서 저장하지 않습니다: {key[0]} ({size:,}바이트)")
+                return
+            self._entries[key] = (df, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+# 같은 프로세스의 모든 에이전트가 공유하는 데이터셋 캐시
+dataset_cache = DatasetCache()
+
+def numeric_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """수치 열을 열 이름 -> numpy 배열로 (nullable 정수 등은 NaN을 쓰는 float로 변환)"""
+    arrays = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        series = df[col]
+        if isinstance(series.dtype, np.dtype):
+            arrays[str(col)] = series.to_numpy()
+        else:
+            arrays[str(col)] = series.to_numpy(dtype=float, na_value=np.nan)
+    return arrays
+
+class SharedArrays:
+    """여러 numpy 배열을 공유 메모리 블록 하나에 담아 다른 프로세스로 전달
+
+    부모 프로세스가 만들고 해제(close)하며, 워커는 descriptor로 같은 블록에
+    붙어 복사 없이 읽습니다. pickle로 배열을 보낼 때의 직렬화/파이프 복사를
+    블록 한 번 채우기로 대신합니다.
+    """
+    
+    ALIGNMENT = 64
+    
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        layout, offset = [], 0
+        for name, array in arrays.items():
+            layout.append((name, array.dtype.str, array.shape, offset))
+            offset += -(-array.nbytes // self.ALIGNMENT) * self.ALIGNMENT
+        self.nbytes = offset
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype, shape, start), array in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=start)[...] = array
+        self.descriptor = (self.shm.name, layout)
+    
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+def run_with_shared_arrays(func: Callable[..., Any], descriptor: Tuple[str, list], *args: Any) -> Any:
+    """워커 프로세스에서 공유 메모리 배열로 func(arrays, *args) 실행"""
+    name, layout = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return func({
+            column: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            for column, dtype, shape, start in layout
+        }, *args)
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # 배열을 참조하는 객체가 남아 있으면 정리 후 다시 시도
+            import gc
+            gc.collect()
+            shm.close()
+
+def describe_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """수치 열 기술통계 (DataFrame.describe)"""
+    return pd.DataFrame(arrays, copy=False).describe().to_dict()
+
+def correlate_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """수치 열 상관계수 행렬"""
+    return pd.DataFrame(arrays, copy=False).corr().to_dict()
+
+def render_chart(arrays: Dict[str, np.ndarray], chart_type: str) -> str:
+    """values(와 scatter의 색상용 codes) 배열로 차트를 그려 Base64 PNG로 반환
+
+    pyplot 전역 상태 대신 Figure 객체를 직접 써서 여러 스레드에서 동시에 그려도 안전합니다.
+    """
+    values = arrays["values"]
+    index = np.arange(len(values))
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    
+    if chart_type == "histogram":
+        ax.hist(values[~np.isnan(values)], bins=20, alpha=0.7)
+        ax.set_title("Value Distribution")
+        ax.set_xlabel("Value")
+        ax.set_ylabel("Frequency")
+    elif chart_type == "line":
+        ax.plot(index, values)
+        ax.set_title("Value Trend")
+        ax.set_xlabel("Index")
+        ax.set_ylabel("Value")
+    elif chart_type == "scatter":
+        if "codes" in arrays:
+            points = ax.scatter(index, values, c=arrays["codes"])
+            fig.colorbar(points, ax=ax, label='Category')
+        else:
+            ax.scatter(index, values)
+        ax.set_title("Value Scatter Plot")
+        ax.set_xlabel("Index")
+        ax.set_ylabel("Value")
+    
+    # 이미지를 Base64로 인코딩
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+# 현재 작업이 실행기에 넘긴 작업들 (AdmissionController가 작업마다 설정)
+TASK_WORK: "contextvars.ContextVar[Optional[set]]" = contextvars.ContextVar("task_work", default=None)
+
+class AnalysisExecutor:
+    """CPU를 많이 쓰는 분석(pandas 집계, matplotlib 렌더링)을 이벤트 루프 밖에서 실행
+
+    process_workers > 0이면 프로세스 풀에서 실행하고 입력 배열은 SharedArrays로
+    넘기며, 0이면 워커 스레드에서 실행합니다. 실행 함수는 배열 딕셔너리를 첫
+    인자로 받는 모듈 수준 함수여야 합니다 (프로세스 간 전달 가능하도록).
+
+    제출한 작업은 TASK_WORK에 기록되므로 작업이 취소되어도 아직 실행 중인
+    스레드/프로세스 작업을 AdmissionController가 슬롯에 계속 셉니다.
+    """
+    
+    def __init__(self, process_workers: int = 0, thread_workers: int = None):
+        self.process_workers = process_workers
+        self.thread_pool = ThreadPoolExecutor(
+            thread_workers or min(32, (os.cpu_count() or 1) + 4), thread_name_prefix="analysis"
+        )
+        self.process_pool = None
+        if process_workers > 0:
+            # 스레드가 있는 서버 프로세스를 fork하지 않도록 spawn 사용
+            self.process_pool = ProcessPoolExecutor(
+                process_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.shared_bytes = 0
+    
+    @classmethod
+    def from_env(cls) -> "AnalysisExecutor":
+        """DATA_ANALYST_PROCESS_WORKERS 환경 변수로 생성 (기본: CPU 수, 최대 4)"""
+        return cls(int(os.environ.get("DATA_ANALYST_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1)))))
+    
+    @staticmethod
+    async def _wait(future: concurrent.futures.Future) -> Any:
+        """실행기 작업 대기 (취소되면 시작 전 작업은 취소하고, 실행 중이면 TASK_WORK에 남김)"""
+        work = TASK_WORK.get()
+        if work is not None:
+            work.add(future)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            if work is not None and future.done():
+                work.discard(future)
+    
+    async def offload(self, func: Callable[..., Any], *args: Any) -> Any:
+        """워커 스레드에서 func(*args) 실행 (asyncio.to_thread 대신 사용)"""
+        return await self._wait(self.thread_pool.submit(contextvars.copy_context().run, func, *args))
+    
+    async def run(self, func: Callable[..., Any], arrays: Dict[str, np.ndarray], *args: Any) -> Any:
+        self.running += 1
+        try:
+            if self.process_pool is None:
+                result = await self.offload(func, arrays, *args)
+            else:
+                shared = await self.offload(SharedArrays, arrays)
+                self.shared_bytes += shared.nbytes
+                try:
+                    future = self.process_pool.submit(run_with_shared_arrays, func, shared.descriptor, *args)
+                except BaseException:
+                    shared.close()
+                    raise
+                # 취소되어도 워커 프로세스가 다 읽은 뒤에 공유 메모리 해제
+                future.add_done_callback(lambda _: shared.close())
+                result = await self._wait(future)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+        self.completed += 1
+        return result
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "process_workers": self.process_workers,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "shared_bytes": self.shared_bytes
+        }
+    
+    def shutdown(self):
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+class AdmissionRejected(Exception):
+    """한도 초과로 작업 접수 거절 (retry_after초 뒤 재시도 권장)"""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Agent Card의 rate_limits를 적용하는 작업 대기열
+
+    최근 60초 동안 접수한 작업 수로 분당 한도를, 실행 슬롯 수로 동시 실행 한도를
+    지킵니다. 슬롯이 없으면 max_queue개까지 접수 순서대로 기다리고, 그 이상이면
+    AdmissionRejected로 거절합니다. 예상 시간은 작업 유형별 실제 실행 시간의
+    지수 이동 평균으로 계산합니다.
+
+    취소된 작업이 실행기에 넘긴 작업(TASK_WORK)이 아직 돌고 있으면 그 작업이
+    끝날 때까지 슬롯을 반환하지 않습니다 (orphaned).
+    """
+    
+    def __init__(self, run: Callable[[str, Dict[str, Any]], Awaitable[None]],
+                 concurrent_tasks: int, requests_per_minute: int, max_queue: int,
+                 estimates: Dict[str, float], default_estimate: float = 30.0):
+        self._run = run
+        self.concurrent_tasks = concurrent_tasks
+        self.requests_per_minute = requests_per_minute
+        self.max_queue = max_queue
+        self.durations = dict(estimates)
+        self.default_estimate = default_estimate
+        self.pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.running: Dict[str, Tuple[asyncio.Task, float, float]] = {}  # 작업 -> (태스크, 시작, 예상 소요)
+        # 번호 -> [남은 실행기 작업 수, 시작, 예상 소요] (취소된 작업 ID가 다시 접수될 수 있어 ID 대신 번호로 구분)
+        self.orphaned: Dict[int, List[Any]] = {}
+        self._orphan_ids = itertools.count()
+        self._accepted: deque = deque()
+        self.rejected = 0
+    
+    def _duration(self, task_data: Dict[str, Any]) -> float:
+        return self.durations.get(task_data.get("operation", "analyze"), self.default_estimate)
+    
+    def _busy(self) -> int:
+        return len(self.running) + len(self.orphaned)
+    
+    def _ends(self) -> List[float]:
+        """사용 중인 슬롯별 예상 종료 시각"""
+        return [started + expected for _, started, expected in self.running.values()] + \
+            [started + expected for _, started, expected in self.orphaned.values()]
+    
+    def submit(self, task_id: str, task_data: Dict[str, Any]):
+        """작업 접수 (한도를 넘으면 AdmissionRejected)"""
+        now = time.monotonic()
+        while self._accepted and now - self._accepted[0] >= 60:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.requests_per_minute:
+            self.rejected += 1
+            raise AdmissionRejected("분당 요청 한도를 초과했습니다", 60 - (now - self._accepted[0]))
+        if self._busy() >= self.concurrent_tasks and len(self.pending) >= self.max_queue:
+            self.rejected += 1
+            next_free = min(self._ends(), default=now)
+            raise AdmissionRejected("작업 대기열이 가득 찼습니다", next_free - now)
+        
+        self._accepted.append(now)
+        self.pending[task_id] = task_data
+        self._dispatch()
+    
+    def is_active(self, task_id: str) -> bool:
+        """대기 중이거나 실행 중인 작업 ID인지 (취소 후 실행기 작업만 남은 경우는 제외)"""
+        return task_id in self.pending or task_id in self.running
+    
+    def cancel(self, task_id: str) -> bool:
+        """대기 중이면 대기열에서 빼고, 실행 중이면 실행을 취소"""
+        if self.pending.pop(task_id, None) is not None:
+            return True
+        entry = self.running.get(task_id)
+        if entry is not None:
+            entry[0].cancel()
+            return True
+        return False
+    
+    async def _start(self, task_id: str, task_data: Dict[str, Any], work: set):
+        TASK_WORK.set(work)
+        await self._run(task_id, task_data)
+    
+    def _dispatch(self):
+        while self.pending and self._busy() < self.concurrent_tasks:
+            task_id, task_data = self.pending.popitem(last=False)
+            work: set = set()
+            task = asyncio.create_task(self._start(task_id, task_data, work))
+            self.running[task_id] = (task, time.monotonic(), self._duration(task_data))
+            task.add_done_callback(
+                lambda task, task_id=task_id, task_data=task_data, work=work:
+                    self._finished(task_id, task_data, task, work)
+            )
+    
+    def _finished(self, task_id: str, task_data: Dict[str, Any], task: asyncio.Task, work: set):
+        _, started, expected = self.running.pop(task_id)
+        if not task.cancelled():
+            operation = task_data.get("operation", "analyze")
+            elapsed = time.monotonic() - started
+            self.durations[operation] = 0.8 * self._duration(task_data) + 0.2 * elapsed
+        
+        leftover = [future for future in work if not future.done()]
+        if leftover:
+            # 스레드/프로세스에서 아직 실행 중인 작업이 끝나야 슬롯 반환
+            submission = next(self._orphan_ids)
+            self.orphaned[submission] = [len(leftover), started, expected]
+            loop = asyncio.get_running_loop()
+            for future in leftover:
+                future.add_done_callback(lambda _, submission=submission: self._notify(loop, submission))
+            return
+        self._dispatch()
+    
+    def _notify(self, loop: asyncio.AbstractEventLoop, submission: int):
+        """실행기 스레드에서 호출되는 완료 콜백 (루프가 이미 닫혔으면 무시)"""
+        try:
+            loop.call_soon_threadsafe(self._orphan_done, submission)
+        except RuntimeError:
+            pass
+    
+    def _orphan_done(self, submission: int):
+        entry = self.orphaned[submission]
+        entry[0] -= 1
+        if not entry[0]:
+            del self.orphaned[submission]
+            self._dispatch()
+    
+    def estimate(self, task_id: str) -> Tuple[Optional[int], float]:
+        """(대기 순서, 예상 완료까지 남은 초), 실행 중이면 대기 순서는 None
+
+        실행 중인 작업의 예상 종료 시각으로 슬롯을 채운 뒤 대기열 앞의 작업부터
+        가장 먼저 비는 슬롯에 배정해 계산합니다.
+        """
+        now = time.monotonic()
+        entry = self.running.get(task_id)
+        if entry is not None:
+            return None, max(0.0, entry[1] + entry[2] - now)
+        
+        slots = [max(now, end) for end in self._ends()]
+        slots += [now] * max(0, self.concurrent_tasks - len(slots))
+        heapq.heapify(slots)
+        for position, (pending_id, task_data) in enumerate(self.pending.items(), 1):
+            finish = heapq.heappop(slots) + self._duration(task_data)
+            if pending_id == task_id:
+                return position, finish - now
+            heapq.heappush(slots, finish)
+        return None, 0.0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": len(self.running),
+            "orphaned": len(self.orphaned),
+            "queued": len(self.pending),
+            "accepted_last_minute": sum(1 for t in self._accepted if time.monotonic() - t < 60),
+            "rejected": self.rejected,
+            "estimated_seconds": {name: round(value, 1) for name, value in self.durations.items()}
+        }
+
+class TaskChannel:
+    """작업 하나의 변경 알림 채널 (변경마다 버전을 올리고 대기 중인 구독자를 깨움)"""
+    
+    def __init__(self):
+        self.version = 0
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+    
+    def publish(self):
+        self.version += 1
+        # 현재 이벤트로 기다리던 구독자를 모두 깨우고 다음 변경용 이벤트로 교체
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def wait(self, seen: int) -> int:
+        """버전이 seen보다 새로워질 때까지 대기 후 현재 버전 반환"""
+        while self.version == seen:
+            await self._changed.wait()
+        return self.version
+
+class TaskEvents:
+    """작업별 상태 변경 pub/sub (SSE 스트림이 폴링 대신 변경을 기다림)
+
+    채널은 구독자가 있는 작업에만 만들어지므로 구독자가 없으면 publish 비용이
+    없고, 기다리는 스트림은 변경이 생길 때까지 아무 일도 하지 않습니다.
+    구독자는 깨어날 때 최신 상태만 읽으므로 연속된 변경은 하나로 합쳐집니다.
+    """
+    
+    def __init__(self):
+        self._channels: Dict[str, TaskChannel] = {}
+    
+    def publish(self, task_id: str):
+        channel = self._channels.get(task_id)
+        if channel is not None:
+            channel.publish()
+    
+    @asynccontextmanager
+    async def subscribe(self, task_id: str):
+        channel = self._channels.get(task_id)
+        if channel is None:
+            channel = self._channels[task_id] = TaskChannel()
+        channel.subscribers += 1
+        try:
+            yield channel
+        finally:
+            channel.subscribers -= 1
+            if not channel.subscribers:
+                self._channels.pop(task_id, None)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(channel.subscribers for channel in self._channels.values())
+        }
+
 class DataAnalysisAgent:
     """A2A 데이터 분석 에이전트"""
     
-    def __init__(self, agent_id: str = "data-analyst-v1", port: int = 8001):
+    # 작업 유형별 초기 예상 시간 (초, 실행할수록 실측값으로 보정)
+    OPERATION_ESTIMATES = {
+        "analyze": 30,
+        "visualize": 45,
+        "trend_analysis": 60,
+        "descriptive_stats": 15,
+        "correlation_analysis": 40
+    }
+    
+    def __init__(self, agent_id: str = "data-analyst-v1", port: int = 8001, data_dir: str = None):
         self.agent_id = agent_id
         self.port = port
         self.endpoint = f"http://localhost:{port}"
         
+        # data_source로 읽을 수 있는 디렉토리 (밖의 경로는 거부)
+        self.data_dir = Path(data_dir or os.environ.get("DATA_ANALYST_DATA_DIR") or os.getcwd()).resolve()
+        self.chunk_rows = DATA_CHUNK_ROWS
+        self.dataset_cache = dataset_cache
+        
+        # pandas/matplotlib 연산을 실행할 프로세스 풀
+        self.analysis_executor = AnalysisExecutor.from_env()
+        
         # 실행 중인 작업들
         self.running_tasks: Dict[str, TaskUpdate] = {}
         
+        # 작업 상태 변경 알림 (SSE 스트림용)
+        self.task_events = TaskEvents()
+        
         # Agent Card 정의
         self.agent_card = AgentCard(
             agent_id=agent_id,
@@ -98,7 +862,8 @@ class DataAnalysisAgent:
             },
             rate_limits={
                 "requests_per_minute": 60,
-                "concurrent_tasks": 5
+                "concurrent_tasks": 5,
+                "max_queued_tasks": int(os.environ.get("DATA_ANALYST_MAX_QUEUE", "20"))
             },
             metadata={
                 "framework": "custom",
@@ -108,10 +873,24 @@ class DataAnalysisAgent:
             }
         )
         
+        # rate_limits를 적용하는 작업 대기열
+        self.admission = AdmissionController(
+            self._execute_task,
+            concurrent_tasks=self.agent_card.rate_limits["concurrent_tasks"],
+            requests_per_minute=self.agent_card.rate_limits["requests_per_minute"],
+            max_queue=self.agent_card.rate_limits["max_queued_tasks"],
+            estimates=self.OPERATION_ESTIMATES
+        )
+        
         # FastAPI 앱 생성
-        self.app = FastAPI(title="Data Analysis Agent", version="1.0.0")
+        self.app = FastAPI(title="Data Analysis Agent", version="1.0.0", lifespan=self._lifespan)
         self._setup_routes()
     
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        yield
+        self.analysis_executor.shutdown()
+    
     def _setup_routes(self):
         """API 엔드포인트 설정"""
         
@@ -125,8 +904,13 @@ class DataAnalysisAgent:
             return self.agent_card.dict()
         
         @self.app.post("/tasks", response_model=TaskResponse)
-        async def create_task(request: TaskRequest, background_tasks: BackgroundTasks):
-            """새 작업 생성"""
+        async def create_task(request: TaskRequest):
+            """새 작업 생성 (rate_limits를 넘으면 429와 Retry-After)"""
+            previous = self.running_tasks.get(request.task_id)
+            if (previous is not None and previous.status in ("accepted", "running")) \
+                    or self.admission.is_active(request.task_id):
+                raise HTTPException(status_code=409, detail="이미 진행 중인 작업 ID입니다")
+            
             try:
                 # 작업 상태 초기화
                 task_update = TaskUpdate(
@@ -137,20 +921,31 @@ class DataAnalysisAgent:
                 )
                 self.running_tasks[request.task_id] = task_update
                 
-                # 백그라운드에서 작업 실행
-                background_tasks.add_task(
-                    self._execute_task, request.task_id, request.task_data
-                )
+                # 대기열에 넣고 슬롯이 나면 실행
+                self.admission.submit(request.task_id, request.task_data)
                 
-                return TaskResponse(
-                    task_id=request.task_id,
-                    status="accepted",
-                    estimated_completion=self._estimate_completion_time(request.task_data)
+            except AdmissionRejected as e:
+                self._forget_task(request.task_id, previous)
+                logger.warning(f"작업 거절 ({request.task_id}): {e}")
+                raise HTTPException(
+                    status_code=429, detail=str(e),
+                    headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
                 )
-                
             except Exception as e:
+                self._forget_task(request.task_id, previous)
                 logger.error(f"작업 생성 오류: {e}")
                 raise HTTPException(status_code=400, detail=str(e))
+            
+            queue_position, estimated_completion = self._estimate_completion_time(request.task_id)
+            if queue_position is not None:
+                self._update_task(request.task_id, message=f"대기 중입니다 ({queue_position}번째)")
+            
+            return TaskResponse(
+                task_id=request.task_id,
+                status="accepted",
+                estimated_completion=estimated_completion,
+                queue_position=queue_position
+            )
         
         @self.app.get("/tasks/{task_id}", response_model=TaskResponse)
         async def get_task_status(task_id: str):
@@ -159,13 +954,18 @@ class DataAnalysisAgent:
                 raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
             
             task_update = self.running_tasks[task_id]
+            queue_position, estimated_completion = None, None
+            if task_update.status in ("accepted", "running"):
+                queue_position, estimated_completion = self._estimate_completion_time(task_id)
             
             return TaskResponse(
                 task_id=task_id,
                 status=task_update.status,
                 result=task_update.result,
                 error=task_update.error,
-                progress=task_update.progress
+                progress=task_update.progress,
+                estimated_completion=estimated_completion,
+                queue_position=queue_position
             )
         
         @self.app.get("/tasks/{task_id}/stream")
@@ -175,23 +975,25 @@ class DataAnalysisAgent:
                 raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
             
             async def event_generator():
-                last_status = None
-                while True:
-                    if task_id in self.running_tasks:
-                        current_update = self.running_tasks[task_id]
-                        
-                        # 상태가 변경되었거나 진행률이 업데이트된 경우만 전송
-                        if (last_status != current_update.status or 
-                            current_update.status == "running"):
-                            
-                            yield f"data: {current_update.json()}\n\n"
-                            last_status = current_update.status
+                async with self.task_events.subscribe(task_id) as channel:
+                    seen = channel.version
+                    while True:
+                        current_update = self.running_tasks.get(task_id)
+                        if current_update is None:
+                            break
+                        yield f"data: {current_update.json()}\n\n"
                         
-                        # 작업이 완료되었으면 스트리밍 종료
-                        if current_update.status in ["completed", "failed"]:
+                        # 작업이 끝났으면 스트리밍 종료
+                        if current_update.status in ["completed", "failed", "cancelled"]:
                             break
-                    
-                    await asyncio.sleep(1)
+                        
+                        # 상태가 바뀔 때까지 대기 (연결 유지를 위해 주기적으로 주석 전송)
+                        while True:
+                            try:
+                                seen = await asyncio.wait_for(channel.wait(seen), SSE_KEEPALIVE_SECONDS)
+                                break
+                            except asyncio.TimeoutError:
+                                yield ": keep-alive\n\n"
             
             return StreamingResponse(
                 event_generator(),
@@ -212,36 +1014,38 @@ class DataAnalysisAgent:
             if task_update.status in ["completed", "failed"]:
                 raise HTTPException(status_code=400, detail="이미 완료된 작업입니다")
             
-            task_update.status = "cancelled"
-            task_update.message = "작업이 취소되었습니다"
+            # 대기 중이면 대기열에서 빼고, 실행 중이면 실행을 중단 (슬롯은 실행기 작업이 끝나면 반환)
+            self.admission.cancel(task_id)
+            self._update_task(task_id, status="cancelled", message="작업이 취소되었습니다")
             
             return {"message": "작업이 취소되었습니다"}
     
-    def _estimate_completion_time(self, task_data: Dict[str, Any]) -> str:
-        """작업 완료 예상 시간 계산"""
-        operation = task_data.get("operation", "analyze")
-        
-        # 작업 유형별 예상 시간 (초)
-        time_estimates = {
-            "analyze": 30,
-            "visualize": 45,
-            "trend_analysis": 60,
-            "descriptive_stats": 15,
-            "correlation_analysis": 40
-        }
-        
-        estimated_seconds = time_estimates.get(operation, 30)
-        completion_time = datetime.now().timestamp() + estimated_seconds
+    def _update_task(self, task_id: str, **changes: Any):
+        """작업 상태를 바꾸고 구독 중인 SSE 스트림에 알림"""
+        task_update = self.running_tasks[task_id]
+        for field, value in changes.items():
+            setattr(task_update, field, value)
+        self.task_events.publish(task_id)
+    
+    def _forget_task(self, task_id: str, previous: Optional[TaskUpdate]):
+        """접수하지 못한 작업의 상태를 이전 상태로 되돌림"""
+        if previous is not None:
+            self.running_tasks[task_id] = previous
+        else:
+            self.running_tasks.pop(task_id, None)
+    
+    def _estimate_completion_time(self, task_id: str) -> Tuple[Optional[int], str]:
+        """(대기 순서, 작업 완료 예상 시각)"""
+        queue_position, remaining = self.admission.estimate(task_id)
+        completion_time = datetime.now().timestamp() + remaining
         
-        return datetime.fromtimestamp(completion_time).isoformat()
+        return queue_position, datetime.fromtimestamp(completion_time).isoformat()
     
     async def _execute_task(self, task_id: str, task_data: Dict[str, Any]):
         """작업 실행"""
         try:
             # 작업 시작
-            self.running_tasks[task_id].status = "running"
-            self.running_tasks[task_id].message = "데이터 분석을 시작합니다"
-            self.running_tasks[task_id].progress = 10
+            self._update_task(task_id, status="running", message="데이터 분석을 시작합니다", progress=10)
             
             operation = task_data.get("operation", "analyze")
             
@@ -259,111 +1063,124 @@ class DataAnalysisAgent:
                 raise ValueError(f"지원하지 않는 작업: {operation}")
             
             # 작업 완료
-            self.running_tasks[task_id].status = "completed"
-            self.running_tasks[task_id].message = "분석이 완료되었습니다"
-            self.running_tasks[task_id].progress = 100
-            self.running_tasks[task_id].result = result
+            self._update_task(
+                task_id,
+                status="completed",
+                message="분석이 완료되었습니다",
+                progress=100,
+                result=result
+            )
             
         except Exception as e:
             logger.error(f"작업 실행 오류 ({task_id}): {e}")
-            self.running_tasks[task_id].status = "failed"
-            self.running_tasks[task_id].message = f"작업 실행 중 오류 발생: {str(e)}"
-            self.running_tasks[task_id].error = str(e)
+            self._update_task(
+                task_id,
+                status="failed",
+                message=f"작업 실행 중 오류 발생: {str(e)}",
+                error=str(e)
+            )
     
     async def _analyze_data(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
-        """일반적인 데이터 분석"""
+        """일반적인 데이터 분석
+
+        data_source 파일을 청크 단위로 한 번만 읽으며 열별 통계를 누적하므로
+        파일 크기와 관계없이 메모리 사용량이 청크 크기로 제한됩니다.
+        median은 근사값입니다 (QuantileSketch).
+        """
         data_source = task_data.get("data_source")
         analysis_type = task_data.get("analysis_type", "basic")
         
         # 진행률 업데이트
-        self.running_tasks[task_id].progress = 20
-        self.running_tasks[task_id].message = "데이터를 로드하는 중..."
-        await asyncio.sleep(1)  # 시뮬레이션
-        
-        # 데이터 로드 (시뮬레이션)
-        if data_source and data_source.endswith('.csv'):
-            # 실제로는 파일을 로드하지만, 여기서는 시뮬레이션 데이터 생성
-            df = self._generate_sample_data()
-        else:
-            # JSON 데이터 처리
-            df = self._generate_sample_data()
-        
-        self.running_tasks[task_id].progress = 50
-        self.running_tasks[task_id].message = "데이터 분석 중..."
-        await asyncio.sleep(2)
+        self._update_task(task_id, progress=20, message="데이터를 로드하는 중...")
         
-        # 기본 통계 분석
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        stats = {}
-        
-        for col in numeric_cols:
-            stats[col] = {
-                "mean": float(df[col].mean()),
-                "median": float(df[col].median()),
-                "std": float(df[col].std()),
-                "min": float(df[col].min()),
-                "max": float(df[col].max()),
-                "count": int(df[col].count())
-            }
+        accumulator = DatasetAccumulator()
+        path = str(self._resolve_data_source(data_source)) if data_source else None
+        cached = self.dataset_cache.peek(path) if path else None
+        if cached is not None:
+            # 다른 작업이 이미 로드한 데이터셋은 다시 읽지 않음
+            await self.analysis_executor.offload(accumulator.update, cached)
+        elif path:
+            reader = await self.analysis_executor.offload(ChunkedDatasetReader, path, self.chunk_rows)
+            try:
+                # 청크 읽기/집계는 워커 스레드에서 (이벤트 루프를 막지 않도록)
+                while await self.analysis_executor.offload(reader.read_into, accumulator):
+                    self._update_task(
+                        task_id,
+                        progress=20 + int(60 * reader.progress()),
+                        message=f"데이터 분석 중... ({accumulator.rows:,}행)"
+                    )
+            finally:
+                reader.close()
+        else:
+            # 데이터 소스가 없으면 샘플 데이터로 분석
+            accumulator.update(self._generate_sample_data())
         
-        self.running_tasks[task_id].progress = 80
-        self.running_tasks[task_id].message = "결과를 생성하는 중..."
-        await asyncio.sleep(1)
+        self._update_task(task_id, progress=80, message="결과를 생성하는 중...")
         
         return {
             "analysis_type": analysis_type,
             "data_source": data_source,
             "dataset_info": {
-                "rows": len(df),
-                "columns": len(df.columns),
-                "numeric_columns": len(numeric_cols)
+                "rows": accumulator.rows,
+                "columns": len(accumulator.column_names),
+                "numeric_columns": len(accumulator.columns),
+                "chunks": accumulator.chunks
             },
-            "statistics": stats,
-            "summary": f"{len(df)}개 행, {len(df.columns)}개 열의 데이터를 분석했습니다."
+            "statistics": accumulator.statistics(),
+            "summary": f"{accumulator.rows}개 행, {len(accumulator.column_names)}개 열의 데이터를 분석했습니다."
         }
     
+    def _resolve_data_source(self, data_source: str) -> Path:
+        """data_source를 데이터 디렉토리 안의 실제 파일 경로로 변환"""
+        path = (self.data_dir / data_source).resolve()
+        if path != self.data_dir and self.data_dir not in path.parents:
+            raise ValueError(f"허용되지 않은 데이터 경로입니다: {data_source}")
+        if not path.is_file():
+            raise FileNotFoundError(f"데이터 파일을 찾을 수 없습니다: {data_source}")
+        return path
+    
+    async def _load_dataset(self, task_data: Dict[str, Any]) -> pd.DataFrame:
+        """data_source를 데이터셋 캐시를 거쳐 로드 (없으면 샘플 데이터)"""
+        data_source = task_data.get("data_source")
+        if not data_source:
+            return self._generate_sample_data()
+        path = str(self._resolve_data_source(data_source))
+        return await self.analysis_executor.offload(self.dataset_cache.get, path, self.chunk_rows)
+    
+    def _value_column(self, df: pd.DataFrame, task_data: Dict[str, Any]) -> str:
+        """시각화할 열 (지정한 column, 'value', 첫 번째 수치 열 순)"""
+        column = task_data.get("column")
+        if column:
+            if column not in df.columns:
+                raise ValueError(f"열을 찾을 수 없습니다: {column}")
+            return column
+        if 'value' in df.columns:
+            return 'value'
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        if not len(numeric_cols):
+            raise ValueError("시각화할 수치형 컬럼이 없습니다")
+        return numeric_cols[0]
+    
     async def _create_visualization(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """데이터 시각화 생성"""
-        self.running_tasks[task_id].progress = 30
-        self.running_tasks[task_id].message = "차트를 생성하는 중..."
+        self._update_task(task_id, progress=30, message="차트를 생성하는 중...")
         
-        # 시뮬레이션 데이터 생성
-        df = self._generate_sample_data()
-        
-        # 시각화 생성 (Base64 인코딩된 이미지로 반환)
-        plt.figure(figsize=(10, 6))
+        df = await self._load_dataset(task_data)
+        column = self._value_column(df, task_data)
         
         chart_type = task_data.get("chart_type", "histogram")
         
-        if chart_type == "histogram":
-            plt.hist(df['value'], bins=20, alpha=0.7)
-            plt.title("Value Distribution")
-            plt.xlabel("Value")
-            plt.ylabel("Frequency")
-        elif chart_type == "line":
-            plt.plot(df.index, df['value'])
-            plt.title("Value Trend")
-            plt.xlabel("Index")
-            plt.ylabel("Value")
-        elif chart_type == "scatter":
-            if 'category' in df.columns:
-                plt.scatter(df.index, df['value'], c=df['category'].astype('category').cat.codes)
-                plt.colorbar(label='Category')
-            else:
-                plt.scatter(df.index, df['value'])
-            plt.title("Value Scatter Plot")
-            plt.xlabel("Index")
-            plt.ylabel("Value")
+        # 시각화 생성 (Base64 인코딩된 이미지로 반환)
+        def chart_arrays() -> Dict[str, np.ndarray]:
+            arrays = {"values": df[column].to_numpy(dtype=float, na_value=np.nan)}
+            if chart_type == "scatter" and 'category' in df.columns:
+                arrays["codes"] = df['category'].astype('category').cat.codes.to_numpy()
+            return arrays
         
-        # 이미지를 Base64로 인코딩
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        arrays = await self.analysis_executor.offload(chart_arrays)
+        image_base64 = await self.analysis_executor.run(render_chart, arrays, chart_type)
         
-        self.running_tasks[task_id].progress = 90
-        await asyncio.sleep(1)
+        self._update_task(task_id, progress=90)
         
         return {
             "chart_type": chart_type,
@@ -374,8 +1191,7 @@ class DataAnalysisAgent:
     
     async def _trend_analysis(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """트렌드 분석"""
-        self.running_tasks[task_id].progress = 40
-        self.running_tasks[task_id].message = "트렌드 패턴을 분석하는 중..."
+        self._update_task(task_id, progress=40, message="트렌드 패턴을 분석하는 중...")
         
         df = self._generate_time_series_data()
         
@@ -387,7 +1203,7 @@ class DataAnalysisAgent:
         recent_trend = df['value'].tail(10).diff().mean()
         trend_direction = "상승" if recent_trend > 0 else "하락" if recent_trend < 0 else "보합"
         
-        self.running_tasks[task_id].progress = 80
+        self._update_task(task_id, progress=80)
         await asyncio.sleep(2)
         
         return {
@@ -404,41 +1220,46 @@ class DataAnalysisAgent:
     
     async def _descriptive_statistics(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """기술통계 분석"""
-        self.running_tasks[task_id].progress = 50
-        self.running_tasks[task_id].message = "기술통계를 계산하는 중..."
+        self._update_task(task_id, progress=50, message="기술통계를 계산하는 중...")
+        
+        df = await self._load_dataset(task_data)
         
-        df = self._generate_sample_data()
+        def overview() -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+            return df.isnull().sum().to_dict(), numeric_arrays(df)
         
-        await asyncio.sleep(1)
+        missing_values, arrays = await self.analysis_executor.offload(overview)
+        if arrays:
+            descriptive_stats = await self.analysis_executor.run(describe_arrays, arrays)
+        else:
+            # 수치 열이 없으면 범주형 요약
+            descriptive_stats = await self.analysis_executor.offload(lambda: df.describe().to_dict())
         
         return {
             "dataset_shape": {"rows": len(df), "columns": len(df.columns)},
-            "missing_values": df.isnull().sum().to_dict(),
+            "missing_values": missing_values,
             "data_types": df.dtypes.astype(str).to_dict(),
-            "descriptive_stats": df.describe().to_dict(),
+            "descriptive_stats": descriptive_stats,
             "summary": "기술통계 분석이 완료되었습니다."
         }
     
     async def _correlation_analysis(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """상관관계 분석"""
-        self.running_tasks[task_id].progress = 60
-        self.running_tasks[task_id].message = "상관관계를 분석하는 중..."
+        self._update_task(task_id, progress=60, message="상관관계를 분석하는 중...")
         
-        df = self._generate_sample_data()
+        df = await self._load_dataset(task_data)
         
         # 수치형 컬럼만 선택
-        numeric_df = df.select_dtypes(include=[np.number])
+        arrays = numeric_arrays(df)
         
-        if len(numeric_df.columns) < 2:
+        if len(arrays) < 2:
             raise ValueError("상관관계 분석을 위해서는 최소 2개의 수치형 컬럼이 필요합니다")
         
         # 상관계수 계산
-        correlation_matrix = numeric_df.corr()
-        
-        await asyncio.sleep(2)
+        correlations = await self.analysis_executor.run(correlate_arrays, arrays)
+        correlation_matrix = pd.DataFrame(correlations)
         
         return {
-            "correlation_matrix": correlation_matrix.to_dict(),
+            "correlation_matrix": correlations,
             "strong_correlations": self._find_strong_correlations(correlation_matrix),
             "summary": "상관관계 분석이 완료되었습니다."
         }
@@ -492,11 +1313,13 @@ def main():
     parser = argparse.ArgumentParser(description='A2A Data Analysis Agent')
     parser.add_argument('--port', type=int, default=8001, help='Port to run the agent on')
     parser.add_argument('--agent-id', type=str, default='data-analyst-v1', help='Agent ID')
+    parser.add_argument('--data-dir', type=str, default=None,
+                        help='Directory data_source paths are resolved against (default: cwd)')
     
     args = parser.parse_args()
     
     # 에이전트 생성
-    agent = DataAnalysisAgent(agent_id=args.agent_id, port=args.port)
+    agent = DataAnalysisAgent(agent_id=args.agent_id, port=args.port, data_dir=args.data_dir)
     
     # 서버 실행
     import uvicorn